@@ -6,6 +6,7 @@ import argparse
 import random
 
 IS_VERBOSE = False
+BULK_RNG = None
 DEFAULT_SEED = 131191368
 
 
@@ -18,6 +19,10 @@ def main():
 
     random.seed(args.seed)
 
+    global BULK_RNG
+    if args.bulk:
+        BULK_RNG = np.random.default_rng(args.seed)
+
     axioms_range = generate_axiom_range(args)
 
     data_set = run_experiments(
@@ -69,6 +74,9 @@ def init_argparse():
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='print the progress of the experiments')
 
+    parser.add_argument('-b', '--bulk', action='store_true',
+                        help='generate the knowledge bases in bulk with NumPy')
+
     return parser
 
 
@@ -128,6 +136,14 @@ def test_gel_max_sat_satisfatibility(axioms_count,
 
     def random_knowledge_bases():
         for _ in range(test_count):
+            if BULK_RNG is not None:
+                yield gel_max_sat.KnowledgeBase.random_bulk(
+                    concepts_count,
+                    axioms_count,
+                    prob_axioms_count,
+                    *(kwargs.values()),
+                    seed=BULK_RNG)
+                continue
             yield gel_max_sat.KnowledgeBase.random(
                 concepts_count,
                 axioms_count,
@@ -1,5 +1,6 @@
 import gel_max_sat
 from gel_max_sat import KnowledgeBase, print_gel_max_sat_problem, save_solution
+from gel_max_sat.gel.owl import ParseCache
 import argparse
 
 
@@ -9,8 +10,11 @@ def main():
     filename = args.file[0]
     weights = args.weights
 
-    kb = KnowledgeBase.from_file(filename)
-    result = gel_max_sat.solve(kb, weights)
+    cache = None if args.cache is None else ParseCache(args.cache or None)
+    kb = KnowledgeBase.from_file(filename, cache=cache)
+    if args.snapshot is not None:
+        kb.save_snapshot(args.snapshot)
+    result = gel_max_sat.solve(kb, weights, algorithm=args.algorithm)
 
     if args.verbose:
         print_gel_max_sat_problem(kb, weights, result)
@@ -33,7 +37,8 @@ def init_argparse():
 
     parser.add_argument(
         'file', nargs=1, type=str,
-        help='path of the OWL file with the Graphic EL ontology')
+        help='path of the OWL, N-Triples or Turtle file with the Graphic EL '
+             'ontology, or of a snapshot of it')
 
     parser.add_argument('-w', '--weights', nargs='*', type=int,
                         help='the finite weights of the knowledge base')
@@ -46,6 +51,29 @@ def init_argparse():
         type=str,
         help='path for the GEL-MaxSAT solution in N-Triples format')
 
+    parser.add_argument(
+        '-a',
+        '--algorithm',
+        default='edmonds-karp',
+        choices=gel_max_sat.ALGORITHMS,
+        help='max-flow algorithm used to compute the minimum cut')
+
+    parser.add_argument(
+        '-s',
+        '--snapshot',
+        type=str,
+        help='path to save the knowledge base as a snapshot, which can be '
+             'given as the file of later runs to skip parsing the ontology')
+
+    parser.add_argument(
+        '-c',
+        '--cache',
+        nargs='?',
+        const='',
+        type=str,
+        help='reuses the knowledge bases parsed before from this directory '
+             '(default: ~/.cache/gel-max-sat)')
+
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='prints the problem and solution')
     return parser
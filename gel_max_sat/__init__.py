@@ -1,10 +1,29 @@
-from .gel_max_sat import solve, is_satisfiable
+from .gel_max_sat import (
+    solve,
+    solve_many,
+    is_satisfiable,
+    get_certain_chain
+)
+from .max_flow import ALGORITHMS
+from .solver import Solver
+from .parametric import solve_parametric
+from .k_best import solve_k_best
+from .cache import SolveCache
+from .stats import SolveStats
 from .gel import KnowledgeBase
 from .util import print_gel_max_sat_problem, save_solution
 
 __all__ = [
+    'ALGORITHMS',
     'is_satisfiable',
+    'get_certain_chain',
     'solve',
+    'solve_many',
+    'solve_parametric',
+    'solve_k_best',
+    'Solver',
+    'SolveCache',
+    'SolveStats',
     'KnowledgeBase',
     'print_gel_max_sat_problem',
     'save_solution']
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from copy import deepcopy
+from .gel_max_sat import solve
+
+
+class SolveCache:
+    """LRU memoization of ``solve`` results.
+
+    Results are keyed by ``kb.fingerprint``, which the knowledge base keeps
+    up to date as axioms are added, together with the weights and the
+    keyword arguments given to ``solve``. At most ``maxsize`` results are
+    kept; the least recently used one is evicted first.
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError(f'Invalid cache size: {maxsize}')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def __len__(self):
+        return len(self._results)
+
+    def solve(self, kb, weights, **kwargs):
+        # saturating first, so the key already covers the derived arrows
+        kb.saturate()
+        key = get_key(kb, weights, kwargs)
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return deepcopy(self._results[key])
+
+        self.misses += 1
+        result = solve(kb, weights, **kwargs)
+        self._results[key] = deepcopy(result)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def get_key(kb, weights, kwargs):
+    weights = () if weights is None else tuple(float(w) for w in weights)
+    return (kb.fingerprint, weights, tuple(sorted(kwargs.items())))
@@ -0,0 +1,112 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from .gel_max_sat import WeightedGraph, dfs, get_cut_set
+from .max_flow import get_algorithm
+
+
+def min_cut_parallel(weighted_graph, algorithm='edmonds-karp', processes=None):
+    """Solves the independent parts of ``weighted_graph`` concurrently.
+
+    Once ``init`` and ``bot`` are removed, every weakly connected
+    component carries its own flow, so each one is solved as a separate
+    subproblem on a process pool. The vertices each subproblem reaches
+    from ``init`` are put together and read by ``get_cut_set``, so the
+    cut is the same one ``min_cut`` returns.
+    """
+    subgraphs = split_components(weighted_graph)
+    visited = [False] * weighted_graph.order
+    visited[weighted_graph.init] = True
+
+    if processes is None or len(subgraphs) <= 1:
+        reached_lists = [solve_component(subgraph, algorithm)
+                         for subgraph in subgraphs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            reached_lists = list(pool.map(
+                solve_component, subgraphs,
+                [algorithm] * len(subgraphs)))
+
+    for reached in reached_lists:
+        for v in reached:
+            visited[v] = True
+    return get_cut_set(weighted_graph, visited)
+
+
+def solve_component(subgraph, algorithm):
+    s, t = subgraph.init, subgraph.bottom
+    residual = subgraph.residual()
+    get_algorithm(algorithm)(subgraph, residual, s, t)
+    visited = dfs(subgraph, residual, s)
+    return [v for local_v, v in enumerate(subgraph.vertices)
+            if visited[local_v]]
+
+
+def split_components(weighted_graph):
+    graph = weighted_graph
+    s, t = graph.init, graph.bottom
+    offsets, heads = graph.offsets, graph.heads
+
+    # the adjacency slices hold reverse edges too, so following every
+    # edge walks the graph as if it were undirected
+    component = [-1] * graph.order
+    components = []
+    for edge in range(offsets[s], offsets[s + 1]):
+        root = heads[edge]
+        if root in (s, t) or component[root] >= 0:
+            continue
+
+        component[root] = len(components)
+        vertices = [root]
+        stack = [root]
+        while len(stack) > 0:
+            u = stack.pop()
+            for edge in range(offsets[u], offsets[u + 1]):
+                v = heads[edge]
+                if v not in (s, t) and component[v] < 0:
+                    component[v] = len(components)
+                    vertices += [v]
+                    stack += [v]
+        components += [vertices]
+
+    component_arrows = [[] for _ in components]
+    direct_arrows = []
+    for arrow, (u, edge) in enumerate(zip(graph.arrow_tails,
+                                          graph.arrow_edges)):
+        v = graph.heads[edge]
+        if u in (s, t) and v in (s, t):
+            direct_arrows += [arrow]
+            continue
+        c = component[u] if u not in (s, t) else component[v]
+        if c >= 0:
+            component_arrows[c] += [arrow]
+
+    subgraphs = [get_subgraph(graph, vertices, arrows)
+                 for vertices, arrows in zip(components, component_arrows)]
+    if len(direct_arrows) > 0:
+        subgraphs += [get_subgraph(graph, [], direct_arrows)]
+    return subgraphs
+
+
+def get_subgraph(weighted_graph, vertices, arrows):
+    graph = weighted_graph
+    vertices = [graph.init, graph.bottom] + vertices
+    indexes = {v: i for i, v in enumerate(vertices)}
+
+    tails = [indexes[graph.arrow_tails[arrow]] for arrow in arrows]
+    heads = [indexes[graph.heads[graph.arrow_edges[arrow]]]
+             for arrow in arrows]
+    pbox_ids = [graph.pbox_ids[arrow] for arrow in arrows]
+    premises = {i: graph.premises[arrow] for i, arrow in enumerate(arrows)
+                if arrow in graph.premises}
+
+    subgraph = WeightedGraph.from_arrows(
+        len(vertices), 0, 1, tails, heads, pbox_ids, premises)
+    subgraph.vertices = array('i', vertices)
+    subgraph.weights = graph.weights
+    subgraph.infinity = graph.infinity
+    subgraph.negative_arrows = []
+    subgraph.capacities = array('d', bytes(16 * len(arrows)))
+    for arrow, edge in zip(arrows, subgraph.arrow_edges):
+        subgraph.capacities[edge] = \
+            graph.capacities[graph.arrow_edges[arrow]]
+    return subgraph
@@ -6,6 +6,8 @@ from .concepts import (
 )
 from .roles import Role
 from .arrows import Arrow
+from .reachability import ReachabilityIndex
+from .snapshot import Snapshot
 
 __all__ = [
     'KnowledgeBase',
@@ -13,4 +15,6 @@ __all__ = [
     'ExistentialConcept',
     'IndividualConcept',
     'Arrow',
+    'ReachabilityIndex',
+    'Snapshot',
     'Role']
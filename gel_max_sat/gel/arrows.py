@@ -2,24 +2,51 @@ from . import roles
 
 
 class Arrow:
-    def __init__(self, concept, role, pbox_id=-1, is_derived=False):
+    __slots__ = ('concept', 'role', 'pbox_id', 'is_derived', 'derivations')
+
+    def __init__(self, concept, role, pbox_id=-1, is_derived=False,
+                 derivations=None):
         self.concept = concept
         self.role = role
         self.pbox_id = pbox_id
         self.is_derived = is_derived
+        # the premises of each derivation of an uncertain arrow, as sorted
+        # tuples of PBox ids, besides its own PBox id if it is asserted
+        self.derivations = derivations
 
     def copy_from(self, concept):
-        return Arrow(concept, self.role, self.pbox_id, self.is_derived)
+        return Arrow(concept, self.role, self.pbox_id, self.is_derived,
+                     self.derivations)
+
+    @property
+    def premise_sets(self):
+        """The PBox ids of the uncertain axioms under each way to get the
+        arrow, as sorted tuples.
+
+        The arrow is gone once every set has lost one of its axioms. An
+        asserted arrow has the set of its own PBox id, and a certain arrow
+        the one empty set.
+        """
+        if self.is_derived:
+            return self.derivations or ((),)
+        own_premises = () if self.pbox_id < 0 else (self.pbox_id,)
+        return (own_premises,) + (self.derivations or ())
+
+    @property
+    def is_certain(self):
+        return () in self.premise_sets
 
     def __eq__(self, other):
         if not isinstance(other, Arrow):
             return NotImplemented
 
-        return (self.concept == other.concept and
-                self.role == other.role)
+        return (self.concept is other.concept and
+                self.role is other.role)
 
     def __hash__(self):
-        return hash((self.concept.iri, self.role.iri))
+        # the ids are dense, so this is a distinct int per (concept, role)
+        # pair for any realistic number of roles
+        return self.concept.id << 20 ^ self.role.id
 
     def __repr__(self):
         return f'Arrow({repr(self.concept)},' \
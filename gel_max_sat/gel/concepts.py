@@ -3,12 +3,18 @@ from . import iri
 
 
 class Concept:
+    __slots__ = ('iri', 'id', 'sup_arrows', 'sub_arrows', '_is_empty',
+                 'emptiness', 'is_individual', 'is_existential')
+
     def __init__(self, iri):
         self.iri = str(iri)
+        # dense id assigned by the KnowledgeBase the concept is added to
+        self.id = -1
         self.sup_arrows = set()
         self.sub_arrows = set()
         self._is_empty = False
-        self.reaches = {self}
+        # the EmptinessIndex keeping _is_empty, once in a knowledge base
+        self.emptiness = None
         self.is_individual = False
         self.is_existential = False
 
@@ -28,6 +34,8 @@ class Concept:
         if not self.has_arrow(sup_arrow):
             self.sup_arrows.add(sup_arrow)
             sup_concept.sub_arrows.add(sub_arrow)
+            if self.emptiness is not None:
+                self.emptiness.arrow_added(self, sup_arrow)
 
     def remove_arrow(self, sup_arrow):
         sup_concept = sup_arrow.concept
@@ -35,10 +43,12 @@ class Concept:
         if self.has_arrow(sup_arrow):
             self.sup_arrows.remove(sup_arrow)
             sup_concept.sub_arrows.remove(sub_arrow)
+            if self.emptiness is not None:
+                self.emptiness.arrow_removed(self, sup_arrow)
 
     def is_a(self):
         return (a.concept for a in self.sup_arrows
-                if isinstance(a.role, roles.IsA) and a.pbox_id < 0)
+                if isinstance(a.role, roles.IsA) and a.is_certain)
 
     def sup_concepts(self, role='all'):
         return (a.concept for a in self.sup_arrows
@@ -57,46 +67,39 @@ class Concept:
                 if a.role != without)
 
     def is_empty(self):
-        visited = set()
-
-        def _is_empty(concept):
-            if concept._is_empty:
-                return True
-            visited.add(concept)
-            reached = False
-            for sup_concept in concept.is_a():
-                if sup_concept not in visited:
-                    reached = reached or _is_empty(sup_concept)
-            concept._is_empty = reached
-            return concept._is_empty
-        return _is_empty(self)
+        if self.emptiness is not None:
+            return self._is_empty
+        # no index keeps the flag of a concept outside a knowledge base
+        return any(concept._is_empty
+                   for concept in walk(self, lambda c: c.is_a()))
 
     def sup_concepts_reached(self, role='all'):
-        visited = set()
-
-        def _sup_concepts_reached(concept):
-            visited.add(concept)
-            yield concept
-            for sup_concept in concept.sup_concepts(role=role):
-                if sup_concept not in visited:
-                    yield from _sup_concepts_reached(sup_concept)
-
-        yield from _sup_concepts_reached(self)
+        yield from walk(self, lambda c: c.sup_concepts(role=role))
 
     def sub_concepts_reach(self, role='all'):
-        visited = set()
-
-        def _sub_concepts_reach(concept):
-            visited.add(concept)
-            yield concept
-            for sub_concept in concept.sub_concepts(role=role):
-                if sub_concept not in visited:
-                    yield from _sub_concepts_reach(sub_concept)
-
-        yield from _sub_concepts_reach(self)
+        yield from walk(self, lambda c: c.sub_concepts(role=role))
+
+
+def walk(concept, get_next):
+    # depth-first preorder with an explicit stack, so deep taxonomies do
+    # not hit the recursion limit
+    visited = {concept}
+    yield concept
+    stack = [get_next(concept)]
+    while len(stack) > 0:
+        for next_concept in stack[-1]:
+            if next_concept not in visited:
+                visited.add(next_concept)
+                yield next_concept
+                stack += [get_next(next_concept)]
+                break
+        else:
+            stack.pop()
 
 
 class EmptyConcept(Concept):
+    __slots__ = ()
+
     def __init__(self, iri):
         super().__init__(iri)
         self._is_empty = True
@@ -107,6 +110,8 @@ class EmptyConcept(Concept):
 
 
 class GeneralConcept(Concept):
+    __slots__ = ()
+
     def __init__(self, iri):
         super().__init__(iri)
 
@@ -116,11 +121,15 @@ class GeneralConcept(Concept):
 
 
 class InitialConcept(Concept):
+    __slots__ = ()
+
     def __init__(self, iri):
         super().__init__(iri)
 
 
 class IndividualConcept(Concept):
+    __slots__ = ()
+
     def __init__(self, iri):
         super().__init__(iri)
         self.is_individual = True
@@ -131,6 +140,8 @@ class IndividualConcept(Concept):
 
 
 class ExistentialConcept(Concept):
+    __slots__ = ('concept_iri', 'role_iri')
+
     def __init__(self, role_iri, concept_iri):
         self.concept_iri = concept_iri
         self.role_iri = role_iri
@@ -0,0 +1,75 @@
+from collections import deque
+
+
+class EmptinessIndex:
+    """Set of the concepts of a KnowledgeBase that reach ``bot`` through
+    certain is-a arrows.
+
+    Each concept's ``_is_empty`` flag is kept in step with the arrows,
+    since the concepts the index owns report every arrow added to or
+    removed from them, through the knowledge base or not. An added arrow
+    spreads emptiness back from its head over the sub arrows. A removed
+    arrow first clears every empty concept that reaches its tail, then
+    puts back the ones that still have a certain is-a arrow to an empty
+    concept (delete and rederive), so only the concepts that depended on
+    the arrow are visited.
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+        self.concepts = set()
+
+    def add_concept(self, concept):
+        concept.emptiness = self
+        if concept._is_empty:
+            self.concepts.add(concept)
+        elif any(is_certain_is_a(a) and a.concept._is_empty
+                 for a in concept.sup_arrows):
+            self.spread([concept])
+
+    def arrow_added(self, sub_concept, arrow):
+        if is_certain_is_a(arrow) and arrow.concept._is_empty:
+            self.spread([sub_concept])
+
+    def arrow_removed(self, sub_concept, arrow):
+        if not is_certain_is_a(arrow) or not sub_concept._is_empty or \
+                sub_concept is self.kb.bot:
+            return
+
+        cleared = []
+        queue = deque([sub_concept])
+        sub_concept._is_empty = False
+        while len(queue) > 0:
+            concept = queue.pop()
+            cleared += [concept]
+            for sub_arrow in concept.sub_arrows:
+                sub = sub_arrow.concept
+                if is_certain_is_a(sub_arrow) and sub._is_empty and \
+                        sub is not self.kb.bot:
+                    sub._is_empty = False
+                    queue.appendleft(sub)
+        self.concepts.difference_update(cleared)
+
+        self.spread([concept for concept in cleared
+                     if any(is_certain_is_a(a) and a.concept._is_empty
+                            for a in concept.sup_arrows)])
+
+    def spread(self, concepts):
+        queue = deque()
+        for concept in concepts:
+            if not concept._is_empty:
+                concept._is_empty = True
+                queue.appendleft(concept)
+
+        while len(queue) > 0:
+            concept = queue.pop()
+            self.concepts.add(concept)
+            for sub_arrow in concept.sub_arrows:
+                sub = sub_arrow.concept
+                if is_certain_is_a(sub_arrow) and not sub._is_empty:
+                    sub._is_empty = True
+                    queue.appendleft(sub)
+
+
+def is_certain_is_a(arrow):
+    return arrow.role.is_isa and arrow.is_certain
@@ -1,4 +1,5 @@
 import random
+import numpy as np
 from . import owl
 from .concepts import (
     Concept,
@@ -9,8 +10,13 @@ from .concepts import (
 )
 from .roles import Role, IsA
 from .arrows import Arrow
+from .saturation import Saturation
+from .emptiness import EmptinessIndex
+from .snapshot import Snapshot, is_snapshot, save_snapshot
 
 from collections import defaultdict
+from contextlib import contextmanager
+from hashlib import blake2b
 
 
 class Axiom:
@@ -40,7 +46,7 @@ class Axiom:
             self.role = self.graph.is_a
 
     def add(self):
-        self.sub_concept.add_arrow(self.arrow)
+        self.graph.add_arrow(self.sub_concept, self.arrow)
         self.role.add_axiom(self.sub_concept, self.sup_concept)
 
     def __hash__(self):
@@ -58,18 +64,33 @@ class KnowledgeBase:
 
         self.is_a = IsA()
 
-        self._concepts = {c.iri: c for c in [self.init, self.bot, self.top]}
-        self._roles = {r.iri: r for r in [self.is_a]}
+        self._concepts = {}
+        self._roles = {}
 
         self.role_inclusions = defaultdict(list)
         self.pbox_axioms = {}
+        self.listeners = []
+        self.saturation = None
+        self._is_fixing_deferred = False
+        self.emptiness = EmptinessIndex(self)
 
-        self.init.add_arrow(Arrow(self.top, self.is_a))
+        self.fingerprint = 0
+        self._concept_digests = []
+        self._role_digests = []
+        for concept in [self.init, self.bot, self.top]:
+            self.intern_concept(concept)
+        self.add_role(self.is_a)
+
+        self.add_arrow(self.init, Arrow(self.top, self.is_a))
 
     @property
     def has_path_init_to_bot(self):
         return self.init.is_empty()
 
+    @property
+    def empty_concepts(self):
+        return set(self.emptiness.concepts)
+
     @property
     def concepts(self):
         return list(self._concepts.values())
@@ -89,17 +110,179 @@ class KnowledgeBase:
         return list(self._roles.values())
 
     def add_concept(self, concept):
-        self._concepts[concept.iri] = concept
+        self.intern_concept(concept)
 
         if isinstance(concept, IndividualConcept):
             self.link_individual_concept(concept)
 
         if isinstance(concept, ExistentialConcept):
-            self.fix_previous_existential_head_axioms(concept)
+            if not self._is_fixing_deferred:
+                self.fix_previous_existential_head_axioms(concept)
             self.link_existential_concept(concept)
 
+        for listener in self.listeners:
+            listener.concept_added(concept)
+
+    def intern_concept(self, concept):
+        if concept.iri in self._concepts:
+            concept.id = self._concepts[concept.iri].id
+        else:
+            concept.id = len(self._concepts)
+            self._concept_digests += [get_digest(concept.iri)]
+            self.update_fingerprint(self._concept_digests[concept.id])
+        self._concepts[concept.iri] = concept
+        self.emptiness.add_concept(concept)
+
     def link_individual_concept(self, concept):
-        self.init.add_arrow(Arrow(concept, self.is_a))
+        self.add_arrow(self.init, Arrow(concept, self.is_a))
+
+    def add_arrow(self, sub_concept, arrow):
+        if sub_concept.has_arrow(arrow):
+            return False
+
+        sub_concept.add_arrow(arrow)
+        self.update_fingerprint(self.get_arrow_digest(sub_concept, arrow))
+        for listener in self.listeners:
+            listener.arrow_added(sub_concept, arrow)
+        return True
+
+    def remove_arrow(self, sub_concept, arrow):
+        """Removes ``arrow`` and returns the arrow that was stored, or None
+        when ``sub_concept`` has no such arrow."""
+        if not sub_concept.has_arrow(arrow):
+            return None
+
+        # the stored arrow may carry a PBox id the given one lacks
+        arrow = next(a for a in sub_concept.sup_arrows if a == arrow)
+        sub_concept.remove_arrow(arrow)
+        self.update_fingerprint(self.get_arrow_digest(sub_concept, arrow),
+                                sign=-1)
+        for listener in self.listeners:
+            listener.arrow_removed(sub_concept, arrow)
+        return arrow
+
+    def set_pbox_id(self, sub_concept, sup_concept, role, pbox_id):
+        """Moves the axiom ``sub_concept ⊑ ∃role.sup_concept`` to another
+        PBox id, -1 making it certain. Returns False when there is no such
+        axiom.
+
+        The listeners see the old arrow removed and the new one added.
+        """
+        sub_concept = self.get_concept(sub_concept)
+        sup_concept = self.get_concept(sup_concept)
+        role = self.get_role(role)
+        arrow = self.remove_arrow(sub_concept, Arrow(sup_concept, role))
+        if arrow is None:
+            return False
+
+        if self.pbox_axioms.get(arrow.pbox_id) == \
+                (sub_concept, sup_concept, role):
+            del self.pbox_axioms[arrow.pbox_id]
+        self.add_arrow(sub_concept, Arrow(sup_concept, role, pbox_id,
+                                          arrow.is_derived))
+        if pbox_id >= 0:
+            self.pbox_axioms[pbox_id] = (sub_concept, sup_concept, role)
+        return True
+
+    def load_arrows(self, subs, roles, sups, pbox_ids):
+        """Adds the arrows ``subs[i] -(roles[i])-> sups[i]`` in bulk.
+
+        The arguments are NumPy arrays of concept ids, role ids and PBox
+        ids. The arrows must be new and their heads need no existential
+        concept, so none of the checks of ``add_axiom`` are made.
+        """
+        concepts = self.concepts
+        all_roles = self.roles
+        listeners = self.listeners
+        emptiness = self.emptiness
+        pbox_axioms = {}
+        for sub, role, sup, pbox_id in zip(subs.tolist(), roles.tolist(),
+                                           sups.tolist(), pbox_ids.tolist()):
+            sub_concept = concepts[sub]
+            sup_concept = concepts[sup]
+            role = all_roles[role]
+            arrow = Arrow(sup_concept, role, pbox_id)
+            sub_concept.sup_arrows.add(arrow)
+            sup_concept.sub_arrows.add(Arrow(sub_concept, role, pbox_id))
+            emptiness.arrow_added(sub_concept, arrow)
+            for listener in listeners:
+                listener.arrow_added(sub_concept, arrow)
+            role.add_axiom(sub_concept, sup_concept)
+            if pbox_id >= 0:
+                pbox_axioms[pbox_id] = (sub_concept, sup_concept, role)
+        self.pbox_axioms.update(pbox_axioms)
+
+        concept_digests = np.array(self._concept_digests, dtype=np.uint64)
+        role_digests = np.array(self._role_digests, dtype=np.uint64)
+        digests = mix_digests(concept_digests[subs], role_digests[roles],
+                              concept_digests[sups],
+                              np.asarray(pbox_ids).astype(np.uint64))
+        self.update_fingerprint(int(digests.sum()))
+
+    def add_axioms_bulk(self, axioms):
+        """Adds the axioms ``(sub_concept, sup_concept, role, pbox_id)`` in
+        bulk and returns how many were new.
+
+        Concepts and roles may be given as objects or IRIs. Heads that
+        match an existential concept are fixed as ``add_axiom`` does, with
+        one lookup built for the whole batch, and repeated arrows keep
+        their first occurrence. The new arrows go through ``load_arrows``.
+        """
+        # consumed first, since producing the axioms may add concepts
+        axioms = list(axioms)
+        concepts = self._concepts
+        roles = self._roles
+        heads = {(self.get_role(concept.role_iri).id,
+                  self.get_concept(concept.concept_iri).id): concept
+                 for concept in self.existential_concepts}
+        is_a = self.is_a
+
+        taken = {}
+        subs, arrow_roles, sups, pbox_ids = [], [], [], []
+        for sub_concept, sup_concept, role, pbox_id in axioms:
+            sub_concept = concepts.get(sub_concept) or \
+                self.get_concept(sub_concept)
+            sup_concept = concepts.get(sup_concept) or \
+                self.get_concept(sup_concept)
+            role = roles.get(role) or self.get_role(role)
+
+            head = heads.get((role.id, sup_concept.id))
+            if head is not None:
+                sup_concept, role = head, is_a
+
+            if sub_concept.id not in taken:
+                taken[sub_concept.id] = {
+                    (arrow.role.id, arrow.concept.id)
+                    for arrow in sub_concept.sup_arrows}
+            key = (role.id, sup_concept.id)
+            if key in taken[sub_concept.id]:
+                continue
+            taken[sub_concept.id].add(key)
+
+            subs += [sub_concept.id]
+            arrow_roles += [role.id]
+            sups += [sup_concept.id]
+            pbox_ids += [pbox_id]
+
+        self.load_arrows(np.array(subs, dtype=np.int64),
+                         np.array(arrow_roles, dtype=np.int64),
+                         np.array(sups, dtype=np.int64),
+                         np.array(pbox_ids, dtype=np.int64))
+        return len(subs)
+
+    def get_arrow_digest(self, sub_concept, arrow):
+        digest = 0
+        for value in (self._concept_digests[sub_concept.id],
+                      self._role_digests[arrow.role.id],
+                      self._concept_digests[arrow.concept.id],
+                      arrow.pbox_id % 2**64):
+            digest = (digest * DIGEST_MULTIPLIER + value) % 2**64
+        return finalize_digest(digest)
+
+    def update_fingerprint(self, digest, sign=1):
+        # order-independent sum of item digests, so removing an item undoes
+        # adding it and the fingerprint never has to be recomputed
+        self.fingerprint = (self.fingerprint + sign * digest) % 2**64
 
     def has_concept(self, concept):
         return concept.iri in self._concepts
@@ -115,24 +298,33 @@ class KnowledgeBase:
         role = self.get_role(existential_concept.role_iri)
         origin_concept = self.get_concept(existential_concept.concept_iri)
 
-        def outdated_sub_concepts():
-            for sub_concept, sup_concept in role.axioms:
-                if sup_concept == origin_concept:
-                    yield sub_concept
-
-        def new_role_axioms():
-            axioms = []
-            for sub_concept, sup_concept in role.axioms:
-                if sup_concept != origin_concept:
-                    axioms += [(sub_concept, sup_concept)]
-            return axioms
-
-        for sub_concept in outdated_sub_concepts():
-            arrow = Arrow(origin_concept, role)
-            sub_concept.remove_arrow(arrow)
-            self.add_axiom(sub_concept, existential_concept, self.is_a)
-
-        role.axioms = new_role_axioms()
+        # only the axioms with this filler are touched; the link of the
+        # existential concept itself is kept
+        outdated_sub_concepts = role.sub_concepts.pop(origin_concept, [])
+        if existential_concept in outdated_sub_concepts:
+            role.add_axiom(existential_concept, origin_concept)
+
+        for sub_concept in outdated_sub_concepts:
+            if sub_concept is existential_concept:
+                continue
+            arrow = self.remove_arrow(sub_concept,
+                                      Arrow(origin_concept, role))
+            if arrow is not None:
+                self.add_axiom(sub_concept, existential_concept, self.is_a,
+                               pbox_id=arrow.pbox_id)
+
+    @contextmanager
+    def deferred_fixing(self):
+        """Defers fixing the axioms whose head matches a new existential
+        concept until the block ends, so bulk loading fixes each filler
+        once instead of on every new existential concept."""
+        self._is_fixing_deferred = True
+        try:
+            yield self
+        finally:
+            self._is_fixing_deferred = False
+            for concept in self.existential_concepts:
+                self.fix_previous_existential_head_axioms(concept)
 
     def link_existential_concept(self, concept):
         # get ri
@@ -147,8 +339,16 @@ class KnowledgeBase:
             is_immutable=True)
 
     def add_role(self, role):
+        if role.iri in self._roles:
+            role.id = self._roles[role.iri].id
+        else:
+            role.id = len(self._roles)
+            self._role_digests += [get_digest(role.iri)]
         self._roles[role.iri] = role
 
+    def has_role(self, role):
+        return role.iri in self._roles
+
     def get_role(self, role):
         if isinstance(role, Role):
             return role
@@ -159,16 +359,45 @@ class KnowledgeBase:
     def add_chained_role_inclusion(self, sub_roles_iri, sup_role_iri):
         sup_role = self.get_role(sup_role_iri)
         self.role_inclusions[sub_roles_iri] += [sup_role]
+        for listener in self.listeners:
+            listener.rules_changed()
 
     def add_role_inclusion(self, sub_role_iri, sup_role_iri):
         sup_role = self.get_role(sup_role_iri)
         self.role_inclusions[sub_role_iri] += [sup_role]
+        for listener in self.listeners:
+            listener.rules_changed()
+
+    def saturate(self):
+        """Adds the arrows implied by the role inclusions, role chains and
+        existential concepts, marked ``is_derived``.
+
+        Only the changes since the last call are saturated; see
+        ``Saturation``.
+        """
+        if self.saturation is None:
+            self.saturation = Saturation(self)
+        self.saturation.saturate()
 
     def add_random_axioms(self, axioms_count, is_uncertain=False):
-        axioms = 0
-        while axioms < axioms_count:
-            pbox_id = axioms if is_uncertain else -1
-            axioms += self.add_random_axiom(pbox_id=pbox_id)
+        concepts = self.concepts
+        roles = self.roles
+        sup_concepts = [c for c in concepts if c is not self.init]
+
+        # drawn until distinct, so the PBox ids stay contiguous
+        drawn = set()
+        axioms = []
+        while len(axioms) < axioms_count:
+            sub_concept = random.choice(concepts)
+            sup_concept = random.choice(sup_concepts)
+            role = random.choice(roles)
+            key = (sub_concept.id, role.id, sup_concept.id)
+            if key in drawn or sub_concept.has_arrow(Arrow(sup_concept, role)):
+                continue
+            drawn.add(key)
+            pbox_id = len(axioms) if is_uncertain else -1
+            axioms += [(sub_concept, sup_concept, role, pbox_id)]
+        self.add_axioms_bulk(axioms)
 
     def add_random_axiom(self, pbox_id=-1):
         sub_concept = random.choice(self.concepts).iri
@@ -201,11 +430,75 @@ class KnowledgeBase:
         self.pbox_axioms[axiom.pbox_id] = (axiom.sub_concept, axiom.sup_concept, axiom.role)
 
     @classmethod
-    def from_file(cls, file):
-        onto, kb = owl.parser.parse(file)
+    def from_file(cls, file, cache=None):
+        """Parses the ontology in ``file``, or loads it when it is a
+        snapshot. N-Triples and Turtle files are read by ``owl.triples``
+        instead of owlready2. With an ``owl.ParseCache``, the parse goes
+        through it.
+
+        ``kb.onto`` is the owlready2 ontology, and None when nothing was
+        parsed by owlready2: for snapshots, for N-Triples and Turtle files
+        and for cache hits.
+        """
+        if is_snapshot(file):
+            kb = cls.load_snapshot(file)
+            kb.onto = None
+            return kb
+        if cache is not None:
+            parse = cache.parse
+        elif owl.triples.is_triples_file(file):
+            parse = owl.triples.parse
+        else:
+            parse = owl.parser.parse
+        onto, kb = parse(file)
         kb.onto = onto
         return kb
 
+    def save_snapshot(self, path):
+        """Writes the knowledge base to ``path`` in the binary format read
+        by ``load_snapshot`` and ``Snapshot``.
+
+        The knowledge base is saturated first, so the snapshot holds the
+        derived arrows a solve needs.
+        """
+        self.saturate()
+        save_snapshot(self, path)
+
+    @classmethod
+    def load_snapshot(cls, path):
+        """Loads a knowledge base saved by ``save_snapshot``.
+
+        The file is memory-mapped, and the concepts are interned and the
+        arrows loaded in bulk, so neither the ontology nor the axioms are
+        parsed again. The derived arrows come back on the next
+        saturation. To only solve it, pass the ``Snapshot`` itself to
+        ``solve`` instead, which builds no concept at all.
+        """
+        with Snapshot(path) as snapshot:
+            kb = cls(snapshot.get_concept_iri(1), snapshot.get_concept_iri(2))
+            for role_id in range(1, snapshot.role_count):
+                kb.add_role(Role(snapshot.get_role_iri(role_id)))
+            for concept_id in range(3, snapshot.concept_count):
+                kb.intern_concept(snapshot.get_concept(concept_id))
+
+            for first, second, sup in snapshot.inclusions.tolist():
+                sup_role = snapshot.get_role_iri(sup)
+                if second < 0:
+                    kb.add_role_inclusion(snapshot.get_role_iri(first),
+                                          sup_role)
+                else:
+                    kb.add_chained_role_inclusion(
+                        (snapshot.get_role_iri(first),
+                         snapshot.get_role_iri(second)), sup_role)
+
+            # init ⊑ top is the one arrow a new knowledge base has
+            is_new = ~((snapshot.subs == kb.init.id) &
+                       (snapshot.roles == kb.is_a.id) &
+                       (snapshot.sups == kb.top.id))
+            kb.load_arrows(snapshot.subs[is_new], snapshot.roles[is_new],
+                           snapshot.sups[is_new], snapshot.pbox_ids[is_new])
+        return kb
+
     @classmethod
     def random(cls,
                concepts_count=20,
@@ -230,3 +523,91 @@ class KnowledgeBase:
         # add uncertain axioms randomly
         graph.add_random_axioms(uncertain_axioms_count, is_uncertain=True)
         return graph
+
+    @classmethod
+    def random_bulk(cls,
+                    concepts_count=20,
+                    axioms_count=80,
+                    uncertain_axioms_count=10,
+                    roles_count=2,
+                    seed=None):
+        """Draws a random knowledge base like ``random``, in bulk.
+
+        All the arrows are drawn at once with NumPy, from ``seed`` or a
+        ``numpy.random.Generator``. The first ``m - p`` distinct arrows
+        are certain and the next ``p`` get the PBox ids ``0..p-1``. This
+        is the same model as ``random``: drawing with replacement and
+        keeping first occurrences is what retrying on duplicates does.
+        """
+        rng = np.random.default_rng(seed)
+        graph = cls('bot', 'top')
+        for i in range(concepts_count):
+            graph.add_concept(Concept(i))
+        for i in range(roles_count):
+            graph.add_role(Role(chr(ord('r') + i)))
+
+        certain_axioms_count = max(0, axioms_count - uncertain_axioms_count)
+        keys = graph.get_random_arrow_keys(
+            rng, certain_axioms_count + uncertain_axioms_count)
+
+        pbox_ids = np.arange(len(keys)) - certain_axioms_count
+        pbox_ids[:certain_axioms_count] = -1
+
+        n, r = len(graph.concepts), len(graph.roles)
+        graph.load_arrows(keys // (r * n), keys // n % r, keys % n, pbox_ids)
+        return graph
+
+    def get_random_arrow_keys(self, rng, count):
+        # an arrow sub -(role)-> sup is keyed as (sub * r + role) * n + sup
+        n, r = len(self._concepts), len(self._roles)
+        init = self.init.id
+        taken = np.array([(concept.id * r + arrow.role.id) * n +
+                          arrow.concept.id
+                          for concept in self.concepts
+                          for arrow in concept.sup_arrows], dtype=np.int64)
+        if count > n * r * (n - 1) - len(taken):
+            raise ValueError(f'Cannot draw {count} distinct arrows')
+
+        keys = np.empty(0, dtype=np.int64)
+        while len(keys) < count:
+            batch_size = max(2 * (count - len(keys)), 1024)
+            subs = rng.integers(n, size=batch_size, dtype=np.int64)
+            roles = rng.integers(r, size=batch_size, dtype=np.int64)
+            sups = rng.integers(n - 1, size=batch_size, dtype=np.int64)
+            sups += sups >= init
+
+            batch = (subs * r + roles) * n + sups
+            _, first = np.unique(batch, return_index=True)
+            batch = batch[np.sort(first)]
+            batch = batch[~np.isin(batch, taken)][:count - len(keys)]
+            keys = np.concatenate([keys, batch])
+            taken = np.concatenate([taken, batch])
+        return keys
+
+
+# multiplier and finalizer of splitmix64, written so that the same digests
+# come out of Python ints and of NumPy uint64 arrays
+DIGEST_MULTIPLIER = 0x9e3779b97f4a7c15
+
+
+def get_digest(text):
+    return int.from_bytes(blake2b(text.encode(), digest_size=8).digest(),
+                          'big')
+
+
+def finalize_digest(digest):
+    digest = ((digest ^ (digest >> 30)) * 0xbf58476d1ce4e5b9) % 2**64
+    digest = ((digest ^ (digest >> 27)) * 0x94d049bb133111eb) % 2**64
+    return digest ^ (digest >> 31)
+
+
+def mix_digests(*columns):
+    multiplier = np.uint64(DIGEST_MULTIPLIER)
+    digest = np.zeros(len(columns[0]), dtype=np.uint64)
+    for column in columns:
+        digest = digest * multiplier + column
+    digest = (digest ^ (digest >> np.uint64(30))) * \
+        np.uint64(0xbf58476d1ce4e5b9)
+    digest = (digest ^ (digest >> np.uint64(27))) * \
+        np.uint64(0x94d049bb133111eb)
+    return digest ^ (digest >> np.uint64(31))
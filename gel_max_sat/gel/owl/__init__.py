@@ -1,3 +1,5 @@
 from . import parser
+from . import triples
+from .cache import ParseCache
 
-__all__ = ['parser']
+__all__ = ['parser', 'triples', 'ParseCache']
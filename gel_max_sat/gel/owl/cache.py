@@ -0,0 +1,164 @@
+import os
+import re
+import tempfile
+from hashlib import blake2b
+from gel_max_sat import gel
+from . import parser, triples
+from ..snapshot import VERSION as SNAPSHOT_VERSION
+
+SUFFIX = '.snapshot'
+
+IMPORT_PATTERNS = (
+    # RDF/XML
+    re.compile(rb'owl:imports\s+rdf:resource\s*=\s*"([^"]+)"'),
+    # N-Triples and Turtle
+    re.compile(rb'(?:owl:imports|<http://www\.w3\.org/2002/07/owl#imports>)'
+               rb'\s*<([^>]+)>'),
+)
+
+
+class ParseCache:
+    """Cache of parsed ontologies, kept as snapshots in ``directory``.
+
+    An ontology is keyed by the content of its file and of the local files
+    it imports, the IRIs of the remote ones, and the versions of the
+    reader used for the file and of the snapshot format, so any change to
+    them is a miss. On a hit the knowledge
+    base is loaded from its snapshot and owlready2 is not used at all.
+
+    Entries are written to a temporary file and renamed into place, so
+    processes sharing the directory only ever see whole snapshots. Once
+    the entries exceed ``max_bytes``, the least recently used ones are
+    removed; a hit touches its entry's mtime.
+    """
+
+    def __init__(self, directory=None, max_bytes=2**30):
+        if max_bytes < 0:
+            raise ValueError(f'Invalid cache size: {max_bytes}')
+        self.directory = get_default_directory() if directory is None \
+            else os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def parse(self, file):
+        """Returns ``(onto, kb)`` like ``parser.parse``, with ``onto``
+        None when ``kb`` comes from the cache.
+
+        An entry that cannot be loaded, say truncated or from another
+        version of the format, is removed and the file parsed again, which
+        counts as a miss.
+        """
+        parse = triples.parse if triples.is_triples_file(file) \
+            else parser.parse
+        if not os.path.isfile(file):
+            # an IRI: there is nothing to hash
+            return parse(file)
+
+        path = os.path.join(self.directory, get_key(file) + SUFFIX)
+        try:
+            kb = gel.KnowledgeBase.load_snapshot(path)
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            self.remove(path)
+        else:
+            self.hits += 1
+            return None, kb
+
+        self.misses += 1
+        onto, kb = parse(file)
+        self.store(path, kb)
+        return onto, kb
+
+    def store(self, path, kb):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            kb.save_snapshot(temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict()
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # another process removed it first
+            pass
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries += [(stat.st_mtime, stat.st_size, entry.path)]
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                self.remove(entry.path)
+        self.hits = 0
+        self.misses = 0
+
+
+def get_default_directory():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'gel-max-sat')
+
+
+def get_key(file):
+    digest = blake2b(digest_size=20)
+    # N-Triples and Turtle files are not read by owlready2
+    reader = triples if triples.is_triples_file(file) else parser
+    digest.update(
+        f'{reader.__name__}:{reader.VERSION}:{SNAPSHOT_VERSION}'.encode())
+
+    seen = set()
+    files = [os.path.abspath(file)]
+    while len(files) > 0:
+        file = files.pop()
+        if file in seen:
+            continue
+        seen.add(file)
+
+        with open(file, 'rb') as f:
+            data = f.read()
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+        for iri in get_imports(data):
+            imported_file = get_local_file(iri, os.path.dirname(file))
+            if imported_file is None:
+                digest.update(iri)
+            else:
+                files += [imported_file]
+    return digest.hexdigest()
+
+
+def get_imports(data):
+    for pattern in IMPORT_PATTERNS:
+        yield from pattern.findall(data)
+
+
+def get_local_file(iri, directory):
+    iri = iri.decode('utf-8')
+    if iri.startswith('file://'):
+        iri = iri[len('file://'):]
+    path = os.path.join(directory, iri)
+    return os.path.abspath(path) if os.path.isfile(path) else None
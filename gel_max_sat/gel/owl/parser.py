@@ -2,6 +2,10 @@ import owlready2 as owl
 from gel_max_sat import gel
 from . import pbox_parser
 
+# part of the parse cache keys: bump it whenever the parsed knowledge
+# bases change, so stale cache entries are not used
+VERSION = 1
+
 
 def parse(file):
     onto = owl.get_ontology(file)
@@ -24,7 +28,8 @@ def get_kb(onto):
 
     add_role_inclusions_from_roles(kb, owl_roles)
     owl_basic_concepts = [owl.Thing] + owl_concepts + owl_individuals
-    add_axioms_from_concepts(kb, owl_basic_concepts)
+    with kb.deferred_fixing():
+        kb.add_axioms_bulk(get_axioms_from_concepts(kb, owl_basic_concepts))
     return kb
 
 
@@ -58,7 +63,7 @@ def add_role_inclusion(kb, owl_sub_role, owl_sup_role):
     kb.add_role_inclusion(owl_sub_role.iri, owl_sup_role.iri)
 
 
-def add_axioms_from_concepts(kb, owl_concepts):
+def get_axioms_from_concepts(kb, owl_concepts):
     for sub_concept in owl_concepts:
         if sub_concept == owl.Nothing:
             continue
@@ -67,36 +72,32 @@ def add_axioms_from_concepts(kb, owl_concepts):
             # ignore trivial axioms
             if sup_concept == owl.Thing:
                 continue
-            add_axiom(kb, sub_concept, sup_concept)
+            yield get_axiom(kb, sub_concept, sup_concept)
 
         for sup_concept in sub_concept.equivalent_to:
-            add_axiom(kb, sub_concept, sup_concept)
-            add_axiom(kb, sup_concept, sub_concept)
+            yield get_axiom(kb, sub_concept, sup_concept)
+            yield get_axiom(kb, sup_concept, sub_concept)
 
         if not is_concept(sub_concept):
             for sup_concept, role in get_individual_sup_and_role(sub_concept):
                 pbox_id = pbox_parser.get_id(sub_concept, sup_concept)
-                kb.add_axiom(
-                    sub_concept.iri,
-                    sup_concept.iri,
-                    role.iri,
-                    pbox_id)
+                yield sub_concept.iri, sup_concept.iri, role.iri, pbox_id
 
 
-def add_axiom(kb, owl_sub_concept, owl_sup_concept):
+def get_axiom(kb, owl_sub_concept, owl_sup_concept):
     sub_concept_iri = get_sub_concept_iri(kb, owl_sub_concept)
     sup_concept_iri = get_sup_concept_iri(owl_sup_concept)
     role_iri = get_role_iri(kb, owl_sup_concept)
     pbox_id = pbox_parser.get_id(owl_sub_concept, owl_sup_concept)
 
-    kb.add_axiom(sub_concept_iri, sup_concept_iri, role_iri, pbox_id)
+    return sub_concept_iri, sup_concept_iri, role_iri, pbox_id
 
 
 def get_sub_concept_iri(kb, owl_sub_concept):
     sub_concept = owl_sub_concept
     if is_existential(owl_sub_concept):
         sub_concept = create_existential_concept(owl_sub_concept)
-        if sub_concept not in kb.concepts:
+        if not kb.has_concept(sub_concept):
             kb.add_concept(sub_concept)
     return sub_concept.iri
 
@@ -0,0 +1,567 @@
+import re
+from collections import defaultdict, namedtuple
+from urllib.parse import urljoin
+from gel_max_sat import gel
+from .pbox_parser import PBOX_ID_HEADER
+
+# part of the parse cache keys of the files read here, like
+# ``parser.VERSION``: bump it whenever the loaded knowledge bases change
+VERSION = 1
+
+RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+RDFS = 'http://www.w3.org/2000/01/rdf-schema#'
+OWL = 'http://www.w3.org/2002/07/owl#'
+
+RDF_TYPE = RDF + 'type'
+RDF_FIRST = RDF + 'first'
+RDF_REST = RDF + 'rest'
+RDF_NIL = RDF + 'nil'
+SUB_CLASS_OF = RDFS + 'subClassOf'
+SUB_PROPERTY_OF = RDFS + 'subPropertyOf'
+COMMENT = RDFS + 'comment'
+EQUIVALENT_CLASS = OWL + 'equivalentClass'
+ON_PROPERTY = OWL + 'onProperty'
+SOME_VALUES_FROM = OWL + 'someValuesFrom'
+PROPERTY_CHAIN_AXIOM = OWL + 'propertyChainAxiom'
+ANNOTATED_SOURCE = OWL + 'annotatedSource'
+ANNOTATED_TARGET = OWL + 'annotatedTarget'
+THING = OWL + 'Thing'
+NOTHING = OWL + 'Nothing'
+CLASS = OWL + 'Class'
+OBJECT_PROPERTY = OWL + 'ObjectProperty'
+# properties that are never roles, even between named terms
+OTHER_PROPERTIES = (OWL + 'DatatypeProperty', OWL + 'AnnotationProperty')
+NAMED_INDIVIDUAL = OWL + 'NamedIndividual'
+
+SUFFIXES = ('.nt', '.ttl')
+
+Triple = namedtuple('Triple', ['subject', 'predicate', 'object'])
+# a '#!pbox-id <id>' comment after the triple from subject to object
+PBoxComment = namedtuple('PBoxComment', ['subject', 'object', 'pbox_id'])
+Literal = namedtuple('Literal', ['value'])
+
+TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>\#[^\n]*)
+  | <(?P<iri>[^>\s]*)>
+  | (?P<string>"""(?:[^"\\]|\\.|"(?!""))*"""
+               |\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\'
+               |"(?:[^"\\\n]|\\.)*"(?!")|'(?:[^'\\\n]|\\.)*'(?!'))
+    (?:@[A-Za-z][\w-]*|\^\^(?:<[^>]*>|[A-Za-z][\w.-]*:[\w.-]*))?
+  | _:(?P<blank>[\w-]+(?:\.[\w-]+)*)
+  | (?P<directive>@prefix|@base|PREFIX(?=\s)|BASE(?=\s))
+  | (?P<pname>(?:[A-Za-z][\w-]*(?:\.[\w-]+)*)?:(?:[\w%:-]+(?:\.[\w%:-]+)*)?)
+  | (?P<number>[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<boolean>true|false)
+  | (?P<a>a)(?![\w:])
+  | (?P<punctuation>[.;,\[\]()])
+''', re.VERBOSE | re.DOTALL)
+
+# a whole N-Triples line with no literal, read without the tokenizer
+TRIPLE_LINE = re.compile(r'''
+    \s*(?:<(?P<subject>[^>\s]*)>|_:(?P<blank_subject>[\w-]+(?:\.[\w-]+)*))
+    \s*<(?P<predicate>[^>\s]*)>
+    \s*(?:<(?P<object>[^>\s]*)>|_:(?P<blank_object>[\w-]+(?:\.[\w-]+)*))
+    \s*\.\s*(?P<comment>\#[^\n]*)?\s*$
+''', re.VERBOSE)
+
+ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f',
+           '"': '"', "'": "'", '\\': '\\'}
+ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)', re.DOTALL)
+
+
+def is_triples_file(file):
+    return str(file).endswith(SUFFIXES)
+
+
+def parse(file, chunk_size=10000):
+    """Reads a GEL knowledge base from an N-Triples or Turtle file.
+
+    Returns ``(None, kb)``, shaped like ``parser.parse``. Only what a GEL
+    ontology uses is read: ``rdfs:subClassOf``, ``owl:equivalentClass``,
+    ``owl:someValuesFrom`` restrictions, ``rdf:type`` of individuals,
+    role assertions, ``rdfs:subPropertyOf`` and two-role
+    ``owl:propertyChainAxiom``. A role assertion is any triple between
+    named terms whose predicate is outside the RDF, RDFS and OWL
+    vocabularies and not declared a datatype or annotation property, so
+    the output of ``save_solution``, which declares nothing, reads back.
+    PBox ids come from ``#!pbox-id`` ``rdfs:comment``s of ``owl:Axiom``
+    annotations, as in the OWL input, or from a ``#!pbox-id <id>``
+    comment after the triple itself.
+
+    The file is read twice, a line at a time: once for the declarations,
+    and once for the axioms, which go to ``add_axioms_bulk`` every
+    ``chunk_size`` axioms. N-Triples may name a blank node again anywhere
+    in the file, so besides the knowledge base every restriction and list
+    node is kept until the end, as are the PBox ids of annotations read
+    after their axiom. Memory thus grows with the blank nodes and late
+    annotations of the file, not with its triples.
+    """
+    kb = gel.KnowledgeBase(NOTHING, THING)
+    other_properties = add_declarations(kb, read_triples(file))
+    TriplesLoader(kb, chunk_size, other_properties).load(read_triples(file))
+    return None, kb
+
+
+def add_declarations(kb, triples):
+    """Adds the declared concepts, individuals and roles to ``kb``, and
+    returns the properties declared as anything but roles."""
+    concepts, individuals, roles = set(), set(), set()
+    other_properties = set()
+    for triple in triples:
+        if not isinstance(triple, Triple) or triple.predicate != RDF_TYPE or \
+                is_blank(triple.subject) or isinstance(triple.object, Literal):
+            continue
+        if triple.object == CLASS:
+            concepts.add(triple.subject)
+        elif triple.object == OBJECT_PROPERTY:
+            roles.add(triple.subject)
+        elif triple.object in OTHER_PROPERTIES:
+            other_properties.add(triple.subject)
+        elif triple.object in (NAMED_INDIVIDUAL, THING) or \
+                not triple.object.startswith((OWL, RDF, RDFS)):
+            individuals.add(triple.subject)
+
+    for iri in sorted(concepts - individuals - {THING, NOTHING}):
+        kb.add_concept(gel.Concept(iri))
+    for iri in sorted(individuals):
+        kb.add_concept(gel.IndividualConcept(iri))
+    for iri in sorted(roles):
+        kb.add_role(gel.Role(iri))
+    return other_properties - roles
+
+
+class TriplesLoader:
+    """Turns a stream of triples into axioms of ``kb``.
+
+    Axioms are buffered and added ``chunk_size`` at a time. An axiom with
+    a restriction is held until the restriction is complete, and a PBox
+    id that is known only after its axiom was added is set at the end.
+    Restrictions and lists are kept for the whole load, since a later
+    triple may name them again; annotations are dropped once complete.
+    """
+
+    def __init__(self, kb, chunk_size, other_properties=()):
+        self.kb = kb
+        self.chunk_size = chunk_size
+        self.other_properties = other_properties
+        self.axioms = []
+        self.restrictions = defaultdict(dict)
+        self.waiting_axioms = defaultdict(list)
+        self.annotations = defaultdict(dict)
+        self.pbox_ids = {}
+        self.lists = defaultdict(dict)
+        self.chains = []
+
+    def load(self, triples):
+        with self.kb.deferred_fixing():
+            for triple in triples:
+                if isinstance(triple, PBoxComment):
+                    self.pbox_ids[(triple.subject, triple.object)] = \
+                        triple.pbox_id
+                else:
+                    self.add_triple(*triple)
+            self.flush()
+            self.add_role_chains()
+        self.set_late_pbox_ids()
+
+    def add_triple(self, subject, predicate, obj):
+        if is_blank(subject) and predicate in (ON_PROPERTY, SOME_VALUES_FROM):
+            self.restrictions[subject][predicate] = obj
+            self.complete_restriction(subject)
+        elif is_blank(subject) and predicate in (RDF_FIRST, RDF_REST):
+            self.lists[subject][predicate] = obj
+        elif is_blank(subject) and predicate in (
+                ANNOTATED_SOURCE, ANNOTATED_TARGET, COMMENT):
+            self.add_annotation(subject, predicate, obj)
+        elif isinstance(obj, Literal):
+            return
+        elif predicate == SUB_CLASS_OF:
+            if subject != NOTHING and obj != THING:
+                self.add_axiom(subject, obj)
+        elif predicate == EQUIVALENT_CLASS:
+            self.add_axiom(subject, obj)
+            self.add_axiom(obj, subject)
+        elif predicate == RDF_TYPE:
+            if self.is_individual(subject) and obj != THING and \
+                    not obj.startswith((OWL, RDF, RDFS)):
+                self.add_axiom(subject, obj)
+        elif predicate == SUB_PROPERTY_OF:
+            self.kb.add_role_inclusion(self.get_role(subject).iri,
+                                       self.get_role(obj).iri)
+        elif predicate == PROPERTY_CHAIN_AXIOM:
+            self.chains += [(obj, subject)]
+        elif self.is_role_assertion(subject, predicate, obj):
+            self.add_axiom(subject, obj, self.get_role(predicate))
+
+    def add_axiom(self, sub_term, sup_term, role=None):
+        blanks = [term for term in (sub_term, sup_term)
+                  if is_blank(term) and not self.is_restriction(term)]
+        if len(blanks) > 0:
+            self.waiting_axioms[blanks[0]] += [(sub_term, sup_term, role)]
+            return
+
+        pbox_id = self.pbox_ids.pop((sub_term, sup_term), -1)
+        if is_blank(sub_term):
+            sub_concept = self.get_existential_concept(sub_term)
+            pbox_id = -1
+        else:
+            sub_concept = self.get_concept(sub_term)
+
+        if role is not None:
+            sup_concept = self.get_concept(sup_term)
+        elif is_blank(sup_term):
+            restriction = self.restrictions[sup_term]
+            role = self.get_role(restriction[ON_PROPERTY])
+            sup_concept = self.get_concept(restriction[SOME_VALUES_FROM])
+        else:
+            sup_concept = self.get_concept(sup_term)
+            role = self.kb.is_a
+
+        self.axioms += [(sub_concept, sup_concept, role, pbox_id)]
+        if len(self.axioms) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        self.kb.add_axioms_bulk(self.axioms)
+        self.axioms = []
+
+    def complete_restriction(self, blank):
+        if not self.is_restriction(blank):
+            return
+        for axiom in self.waiting_axioms.pop(blank, []):
+            self.add_axiom(*axiom)
+
+    def is_restriction(self, term):
+        return len(self.restrictions.get(term, ())) == 2
+
+    def add_annotation(self, blank, predicate, obj):
+        annotation = self.annotations[blank]
+        if predicate == COMMENT:
+            pbox_id = get_pbox_id(obj)
+            if pbox_id is None:
+                return
+            annotation[COMMENT] = pbox_id
+        else:
+            annotation[predicate] = obj
+
+        if len(annotation) == 3:
+            del self.annotations[blank]
+            self.pbox_ids[(annotation[ANNOTATED_SOURCE],
+                           annotation[ANNOTATED_TARGET])] = \
+                annotation[COMMENT]
+
+    def add_role_chains(self):
+        for head, sup_role in self.chains:
+            roles = []
+            node = head
+            while node in self.lists:
+                roles += [self.lists[node].get(RDF_FIRST)]
+                node = self.lists[node].get(RDF_REST)
+            if node == RDF_NIL and len(roles) == 2 and None not in roles:
+                self.get_role(sup_role)
+                self.kb.add_chained_role_inclusion(
+                    tuple(self.get_role(role).iri for role in roles),
+                    sup_role)
+
+    def set_late_pbox_ids(self):
+        # annotations read after their axiom was added
+        for (sub_term, sup_term), pbox_id in self.pbox_ids.items():
+            if is_blank(sub_term) or not self.kb.has_concept(
+                    gel.Concept(sub_term)):
+                continue
+            if is_blank(sup_term):
+                if not self.is_restriction(sup_term):
+                    continue
+                restriction = self.restrictions[sup_term]
+                role = self.get_role(restriction[ON_PROPERTY])
+                sup_concept = self.get_concept(restriction[SOME_VALUES_FROM])
+                existential_concept = gel.ExistentialConcept(
+                    role.iri, sup_concept.iri)
+                if self.kb.has_concept(existential_concept):
+                    sup_concept, role = existential_concept.iri, self.kb.is_a
+            elif self.kb.has_concept(gel.Concept(sup_term)):
+                sup_concept = sup_term
+                role = self.get_late_role(sub_term, sup_term)
+            else:
+                continue
+            self.kb.set_pbox_id(sub_term, sup_concept, role, pbox_id)
+
+    def get_late_role(self, sub_term, sup_term):
+        sub_concept = self.kb.get_concept(sub_term)
+        sup_concept = self.kb.get_concept(sup_term)
+        return next((arrow.role for arrow in sub_concept.sup_arrows
+                     if arrow.concept is sup_concept), self.kb.is_a)
+
+    def get_concept(self, iri):
+        if not self.kb.has_concept(gel.Concept(iri)):
+            self.kb.add_concept(gel.Concept(iri))
+        return self.kb.get_concept(iri)
+
+    def get_existential_concept(self, blank):
+        restriction = self.restrictions[blank]
+        role = self.get_role(restriction[ON_PROPERTY])
+        concept = self.get_concept(restriction[SOME_VALUES_FROM])
+        existential_concept = gel.ExistentialConcept(role.iri, concept.iri)
+        if not self.kb.has_concept(existential_concept):
+            self.kb.add_concept(existential_concept)
+        return self.kb.get_concept(existential_concept.iri)
+
+    def get_role(self, iri):
+        if not self.is_role(iri):
+            self.kb.add_role(gel.Role(iri))
+        return self.kb.get_role(iri)
+
+    def is_role(self, iri):
+        return self.kb.has_role(gel.Role(iri))
+
+    def is_role_assertion(self, subject, predicate, obj):
+        if is_blank(subject) or is_blank(obj):
+            return False
+        return self.is_role(predicate) or (
+            not predicate.startswith((OWL, RDF, RDFS)) and
+            predicate not in self.other_properties)
+
+    def is_individual(self, iri):
+        return self.kb.has_concept(gel.Concept(iri)) and \
+            self.kb.get_concept(iri).is_individual
+
+
+def get_pbox_id(literal):
+    tokens = literal.value.split()
+    if len(tokens) > 1 and tokens[0] == PBOX_ID_HEADER:
+        return int(tokens[1])
+    return None
+
+
+def is_blank(term):
+    return isinstance(term, str) and term.startswith('_:')
+
+
+def read_triples(file):
+    """Yields the ``Triple``s of an N-Triples or Turtle file, and a
+    ``PBoxComment`` after each triple followed by a ``#!pbox-id``
+    comment."""
+    with open(file, encoding='utf-8') as lines:
+        yield from TurtleReader(lines).read()
+
+
+class TurtleReader:
+    """Line-oriented reader of N-Triples and of the Turtle subset with
+    prefixes, ``a``, ``;`` and ``,`` lists, ``[ ]`` blank nodes and
+    ``( )`` collections."""
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.text = ''
+        self.position = 0
+        self.prefixes = {}
+        self.base = ''
+        self.blank_count = 0
+        self.peeked = None
+        self.triples = []
+        self.last_triple = None
+
+    def read(self):
+        while True:
+            if self.peeked is None and self.position >= len(self.text):
+                line = next(self.lines, None)
+                if line is None:
+                    return
+                match = TRIPLE_LINE.match(line)
+                if match is None:
+                    self.text = line
+                    self.position = 0
+                else:
+                    self.read_triple_line(match)
+            elif self.peek() is None:
+                return
+            else:
+                self.read_statement()
+            yield from self.triples
+            self.triples = []
+
+    def read_triple_line(self, match):
+        def get_term(name):
+            if match.group(name) is not None:
+                return self.get_term('iri', match.group(name))
+            return self.get_term('blank', match.group('blank_' + name))
+
+        self.add_triple(get_term('subject'),
+                        self.get_term('iri', match.group('predicate')),
+                        get_term('object'))
+        if match.group('comment') is not None:
+            self.read_comment(match.group('comment'))
+
+    def read_statement(self):
+        kind, value = self.next()
+        if kind == 'directive':
+            self.read_directive(value)
+            return
+
+        if (kind, value) == ('punctuation', '['):
+            subject = self.read_blank_node_properties()
+            if self.peek() != ('punctuation', '.'):
+                self.read_predicate_objects(subject)
+        else:
+            subject = self.get_term(kind, value)
+            self.read_predicate_objects(subject)
+        self.expect('.')
+
+    def read_directive(self, directive):
+        is_sparql = not directive.startswith('@')
+        if directive.lower().endswith('prefix'):
+            _, prefix = self.next()
+            _, iri = self.next()
+            self.prefixes[prefix[:-1]] = urljoin(self.base, iri)
+        else:
+            _, iri = self.next()
+            self.base = urljoin(self.base, iri)
+        if not is_sparql:
+            self.expect('.')
+
+    def read_predicate_objects(self, subject):
+        while True:
+            kind, value = self.next()
+            predicate = RDF_TYPE if kind == 'a' else self.get_term(kind, value)
+            self.read_objects(subject, predicate)
+            if self.peek() != ('punctuation', ';'):
+                return
+            while self.peek() == ('punctuation', ';'):
+                self.next()
+            if self.peek() in (('punctuation', '.'), ('punctuation', ']')):
+                return
+
+    def read_objects(self, subject, predicate):
+        while True:
+            self.add_triple(subject, predicate, self.read_object())
+            if self.peek() != ('punctuation', ','):
+                return
+            self.next()
+
+    def read_object(self):
+        kind, value = self.next()
+        if (kind, value) == ('punctuation', '['):
+            return self.read_blank_node_properties()
+        if (kind, value) == ('punctuation', '('):
+            return self.read_collection()
+        return self.get_term(kind, value)
+
+    def read_blank_node_properties(self):
+        blank = self.new_blank()
+        if self.peek() != ('punctuation', ']'):
+            self.read_predicate_objects(blank)
+        self.expect(']')
+        return blank
+
+    def read_collection(self):
+        items = []
+        while self.peek() != ('punctuation', ')'):
+            items += [self.read_object()]
+        self.expect(')')
+
+        head = RDF_NIL
+        for item in reversed(items):
+            node = self.new_blank()
+            self.add_triple(node, RDF_FIRST, item)
+            self.add_triple(node, RDF_REST, head)
+            head = node
+        return head
+
+    def add_triple(self, subject, predicate, obj):
+        self.last_triple = Triple(subject, predicate, obj)
+        self.triples += [self.last_triple]
+
+    def new_blank(self):
+        self.blank_count += 1
+        return f'_:turtle{self.blank_count}'
+
+    def get_term(self, kind, value):
+        if kind == 'iri':
+            return urljoin(self.base, value) if self.base else value
+        if kind == 'blank':
+            return '_:' + value
+        if kind == 'pname':
+            prefix, local = value.split(':', 1)
+            if prefix not in self.prefixes:
+                raise ValueError(f'Undefined prefix: {prefix}')
+            return self.prefixes[prefix] + local
+        if kind == 'string':
+            return Literal(get_string(value))
+        if kind in ('number', 'boolean'):
+            return Literal(value)
+        raise ValueError(f'Unexpected token: {value}')
+
+    def expect(self, punctuation):
+        token = self.next()
+        if token != ('punctuation', punctuation):
+            raise ValueError(f'Expected {punctuation!r}, got {token[1]!r}')
+
+    def peek(self):
+        if self.peeked is None:
+            self.peeked = self.read_token()
+        return self.peeked
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError('Unexpected end of file')
+        self.peeked = None
+        return token
+
+    def read_token(self):
+        while True:
+            if self.position >= len(self.text):
+                if not self.read_line():
+                    return None
+                continue
+
+            match = TOKEN.match(self.text, self.position)
+            if match is None or (match.lastgroup == 'string' and
+                                 match.end() == len(self.text)):
+                # a string may go on in the next lines
+                if self.read_line():
+                    continue
+                if match is None:
+                    raise ValueError('Invalid syntax: '
+                                     f'{self.text[self.position:].strip()}')
+            self.position = match.end()
+
+            kind = match.lastgroup
+            if kind == 'comment':
+                self.read_comment(match.group(kind))
+            elif kind != 'space':
+                return kind, match.group(kind)
+
+    def read_comment(self, comment):
+        tokens = comment[1:].split()
+        if len(tokens) > 1 and '#' + tokens[0] == PBOX_ID_HEADER and \
+                self.last_triple is not None:
+            self.triples += [PBoxComment(self.last_triple.subject,
+                                         self.last_triple.object,
+                                         int(tokens[1]))]
+
+    def read_line(self):
+        line = next(self.lines, None)
+        if line is None:
+            return False
+        # only the unread text is kept, so memory is bounded by a statement
+        self.text = self.text[self.position:] + line
+        self.position = 0
+        return True
+
+
+def get_string(token):
+    quote = token[0]
+    if token.startswith(quote * 3):
+        body = token[3:token.rindex(quote * 3)]
+    else:
+        body = token[1:token.rindex(quote)]
+    return ESCAPE.sub(get_escaped, body)
+
+
+def get_escaped(match):
+    escape = match.group(1)
+    if escape[0] in 'uU' and len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return ESCAPES.get(escape, escape)
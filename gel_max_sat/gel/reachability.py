@@ -0,0 +1,155 @@
+import numpy as np
+
+
+class ReachabilityIndex:
+    """Answers whether a concept reaches another one through arrows.
+
+    Only the arrows of ``role`` are followed, or every arrow with
+    ``role='all'``. The arrows are condensed into strongly connected
+    components, and each component keeps a bitset of the components it
+    reaches, as a row of a packed NumPy bit matrix. ``reaches`` then reads
+    a single bit. An added arrow ORs the row of its head into the rows
+    of every component that reaches its tail; a removed arrow makes the
+    index rebuild itself on the next query.
+    """
+
+    def __init__(self, kb, role='all'):
+        self.kb = kb
+        self.role = role if role == 'all' else kb.get_role(role)
+        self.build()
+        kb.listeners += [self]
+
+    def build(self):
+        concepts = self.kb.concepts
+        order = len(concepts)
+        successors = [[] for _ in range(order)]
+        for concept in concepts:
+            for arrow in concept.sup_arrows:
+                if self.follows(arrow):
+                    successors[concept.id] += [arrow.concept.id]
+
+        # Tarjan numbers every component after the ones it reaches, so
+        # their rows are complete by the time they are read
+        component, count = get_strong_components(successors, range(order),
+                                                 order)
+        component_successors = [set() for _ in range(count)]
+        for u, vertices in enumerate(successors):
+            for v in vertices:
+                if component[u] != component[v]:
+                    component_successors[component[u]].add(component[v])
+
+        self.component = component
+        self.count = count
+        self.matrix = get_bit_matrix(count)
+        for c in range(count):
+            self.set_bit(c, c)
+            if len(component_successors[c]) > 0:
+                self.matrix[c] |= np.bitwise_or.reduce(
+                    self.matrix[list(component_successors[c])], axis=0)
+        self.is_stale = False
+
+    def follows(self, arrow):
+        return self.role == 'all' or arrow.role is self.role
+
+    def reaches(self, concept, other_concept):
+        if self.is_stale:
+            self.build()
+        c = self.component[self.kb.get_concept(concept).id]
+        other_c = self.component[self.kb.get_concept(other_concept).id]
+        return bool(self.matrix[c, other_c >> 3] >> (other_c & 7) & 1)
+
+    def reached(self, concept):
+        if self.is_stale:
+            self.build()
+        c = self.component[self.kb.get_concept(concept).id]
+        bits = np.unpackbits(self.matrix[c], bitorder='little')
+        return [other for other in self.kb.concepts
+                if bits[self.component[other.id]]]
+
+    def set_bit(self, c, other_c):
+        self.matrix[c, other_c >> 3] |= 1 << (other_c & 7)
+
+    def arrow_added(self, sub_concept, arrow):
+        if self.is_stale or not self.follows(arrow):
+            return
+        c = self.get_component(sub_concept)
+        other_c = self.get_component(arrow.concept)
+        column = self.matrix[:self.count, c >> 3] & (1 << (c & 7))
+        self.matrix[np.flatnonzero(column)] |= self.matrix[other_c]
+
+    def arrow_removed(self, sub_concept, arrow):
+        if self.follows(arrow):
+            self.is_stale = True
+
+    def concept_added(self, concept):
+        if not self.is_stale:
+            self.get_component(concept)
+
+    def get_component(self, concept):
+        # concepts added after the build get a component of their own; the
+        # KB may link a concept before announcing it
+        while concept.id >= len(self.component):
+            if self.count == len(self.matrix):
+                matrix = get_bit_matrix(2 * self.count)
+                matrix[:self.count, :self.matrix.shape[1]] = self.matrix
+                self.matrix = matrix
+            self.component += [self.count]
+            self.set_bit(self.count, self.count)
+            self.count += 1
+        return self.component[concept.id]
+
+    def rules_changed(self):
+        pass
+
+
+def get_bit_matrix(count):
+    count = max(count, 8)
+    return np.zeros((count, (count + 7) // 8), dtype=np.uint8)
+
+
+def get_strong_components(successors, vertices, order):
+    # iterative Tarjan, so deep chains of certain arrows do not hit the
+    # recursion limit
+    component = [-1] * order
+    index = [-1] * order
+    low = [0] * order
+    on_stack = [False] * order
+    stack = []
+    counter = 0
+    components_count = 0
+
+    for root in vertices:
+        if index[root] >= 0:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack += [root]
+        on_stack[root] = True
+        work = [(root, iter(successors[root]))]
+        while len(work) > 0:
+            v, children = work[-1]
+            for w in children:
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack += [w]
+                    on_stack[w] = True
+                    work += [(w, iter(successors[w]))]
+                    break
+                if on_stack[w]:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if len(work) > 0:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    w = -1
+                    while w != v:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = components_count
+                    components_count += 1
+
+    return component, components_count
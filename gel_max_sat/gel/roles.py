@@ -1,14 +1,26 @@
+from collections import defaultdict
 from . import iri
 
 
 class Role():
+    __slots__ = ('iri', 'id', 'sub_concepts', 'is_isa')
+
     def __init__(self, iri):
         self.iri = iri
-        self.axioms = []
+        # dense id assigned by the KnowledgeBase the role is added to
+        self.id = -1
+        # filler concept -> sub concepts of the axioms sub ⊑ ∃role.filler
+        self.sub_concepts = defaultdict(list)
         self.is_isa = False
 
+    @property
+    def axioms(self):
+        return [(sub_concept, sup_concept)
+                for sup_concept, sub_concepts in self.sub_concepts.items()
+                for sub_concept in sub_concepts]
+
     def add_axiom(self, sub_concept, sup_concept):
-        self.axioms += [(sub_concept, sup_concept)]
+        self.sub_concepts[sup_concept].append(sub_concept)
 
     @property
     def name(self):
@@ -19,6 +31,8 @@ class Role():
 
 
 class IsA(Role):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__('is a')
         self.is_isa = True
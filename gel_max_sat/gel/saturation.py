@@ -0,0 +1,233 @@
+from collections import defaultdict, deque
+from .arrows import Arrow
+from .concepts import ExistentialConcept
+
+
+class Saturation:
+    """Worklist completion of a KnowledgeBase.
+
+    Keeps the facts ``C ⊑ ∃r.D`` that follow from the arrows, the role
+    inclusions ``r ⊑ s`` and the role chains ``r ∘ s ⊑ t``, closed under
+    ``D ⊑ E``. Facts are indexed by (role, filler) and by (subject, role),
+    so each rule firing is a constant number of dict lookups. When a fact
+    ``C ⊑ ∃r.E`` meets an existential concept ``∃r.E``, the arrow
+    ``C ⊑ "∃r.E"`` is added to the knowledge base, marked ``is_derived``.
+    Only the roles that can lead to an existential concept are tracked.
+
+    A fact carries the sets of PBox ids of its uncertain premises, one
+    per derivation, so it is gone only once every set has lost an axiom.
+    A set that contains another is dropped, since removing the smaller
+    one removes it too. Each derived arrow keeps the sets of its fact in
+    ``Arrow.derivations``, and so does an asserted arrow that saturation
+    derives as well. Added arrows are saturated incrementally; a removed
+    arrow, a new existential concept or a new role inclusion restarts the
+    saturation on the next call.
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+        self.derived_arrows = []
+        self.extended_arrows = []
+        self.is_updating = False
+        self.reset()
+        kb.listeners += [self]
+
+    def reset(self):
+        self.is_updating = True
+        for sub_concept, arrow in self.derived_arrows:
+            self.kb.remove_arrow(sub_concept, arrow)
+        for sub_concept, arrow in self.extended_arrows:
+            # the asserted arrow goes back to its own PBox id alone
+            arrow = self.kb.remove_arrow(sub_concept, arrow)
+            if arrow is not None:
+                self.kb.add_arrow(sub_concept, Arrow(
+                    arrow.concept, arrow.role, arrow.pbox_id))
+        self.is_updating = False
+
+        self.derived_arrows = []
+        self.extended_arrows = []
+        self.facts_by_subject = defaultdict(dict)
+        self.facts_by_filler = defaultdict(dict)
+        self.filler_roles = defaultdict(set)
+        self.facts = deque()
+        self.arrows = deque((concept, arrow)
+                            for concept in self.kb.concepts
+                            for arrow in concept.sup_arrows)
+        self.needs_reset = False
+        self.build_rules()
+
+    def build_rules(self):
+        kb = self.kb
+        roles = {role.iri: role for role in kb.roles}
+
+        self.inclusions = defaultdict(list)
+        self.chains_by_first = defaultdict(list)
+        self.chains_by_second = defaultdict(list)
+        for sub_roles, sup_roles in kb.role_inclusions.items():
+            for sup_role in sup_roles:
+                if not isinstance(sub_roles, tuple):
+                    if sub_roles in roles:
+                        self.inclusions[roles[sub_roles].id] += [sup_role]
+                    continue
+                first, second = (roles.get(iri) for iri in sub_roles)
+                if first is not None and second is not None:
+                    self.chains_by_first[first.id] += [(second, sup_role)]
+                    self.chains_by_second[second.id] += [(first, sup_role)]
+
+        self.existentials = {}
+        for concept in kb.existential_concepts:
+            role = kb.get_role(concept.role_iri)
+            filler = kb.get_concept(concept.concept_iri)
+            self.existentials[(role.id, filler.id)] = concept
+        self.relevant_roles = self.get_relevant_roles()
+
+    def get_relevant_roles(self):
+        relevant_roles = {role_id for role_id, _ in self.existentials}
+        is_changed = True
+        while is_changed:
+            is_changed = False
+            for role_id, sup_roles in self.inclusions.items():
+                if role_id not in relevant_roles and \
+                        any(r.id in relevant_roles for r in sup_roles):
+                    relevant_roles.add(role_id)
+                    is_changed = True
+            for first_id, chains in self.chains_by_first.items():
+                for second, sup_role in chains:
+                    if sup_role.id in relevant_roles and \
+                            not {first_id, second.id} <= relevant_roles:
+                        relevant_roles |= {first_id, second.id}
+                        is_changed = True
+        return relevant_roles
+
+    def arrow_added(self, sub_concept, arrow):
+        if not self.is_updating:
+            self.arrows.append((sub_concept, arrow))
+
+    def arrow_removed(self, sub_concept, arrow):
+        if not self.is_updating:
+            self.needs_reset = True
+
+    def concept_added(self, concept):
+        if isinstance(concept, ExistentialConcept):
+            self.needs_reset = True
+
+    def rules_changed(self):
+        self.needs_reset = True
+
+    def saturate(self):
+        if self.needs_reset:
+            self.reset()
+
+        while len(self.facts) > 0 or len(self.arrows) > 0:
+            while len(self.facts) > 0:
+                self.fire(*self.facts.popleft())
+            if len(self.arrows) > 0:
+                self.add_arrow_facts(*self.arrows.popleft())
+
+    def add_arrow_facts(self, sub_concept, arrow):
+        if not arrow.role.is_isa:
+            for arrow_premises in arrow.premise_sets:
+                self.add_fact(sub_concept, arrow.role, arrow.concept,
+                              frozenset(arrow_premises))
+            return
+
+        # every C ⊑ ∃r.sub_concept now also gives C ⊑ ∃r.arrow.concept
+        for role in list(self.filler_roles.get(sub_concept.id, ())):
+            facts = self.facts_by_filler[(role.id, sub_concept.id)]
+            for concept, premise_sets in list(facts.items()):
+                for premises in list(premise_sets):
+                    for arrow_premises in arrow.premise_sets:
+                        self.add_fact(concept, role, arrow.concept,
+                                      premises.union(arrow_premises))
+
+    def add_fact(self, sub_concept, role, filler, premises):
+        if role.id not in self.relevant_roles:
+            return
+
+        facts = self.facts_by_subject[(sub_concept.id, role.id)]
+        premise_sets = facts.get(filler)
+        if premise_sets is None:
+            premise_sets = facts[filler] = []
+            self.facts_by_filler[(role.id, filler.id)][sub_concept] = \
+                premise_sets
+            self.filler_roles[filler.id].add(role)
+        if add_premises(premise_sets, premises):
+            self.facts.append((sub_concept, role, filler, premises))
+
+    def fire(self, sub_concept, role, filler, premises):
+        existential = self.existentials.get((role.id, filler.id))
+        if existential is not None and existential is not sub_concept:
+            self.derive(sub_concept, existential, premises)
+
+        for arrow in list(filler.sup_arrows):
+            if arrow.role.is_isa:
+                for arrow_premises in arrow.premise_sets:
+                    self.add_fact(sub_concept, role, arrow.concept,
+                                  premises.union(arrow_premises))
+
+        for sup_role in self.inclusions.get(role.id, ()):
+            self.add_fact(sub_concept, sup_role, filler, premises)
+
+        for second, sup_role in self.chains_by_first.get(role.id, ()):
+            facts = self.facts_by_subject.get((filler.id, second.id), {})
+            for concept, premise_sets in list(facts.items()):
+                for second_premises in list(premise_sets):
+                    self.add_fact(sub_concept, sup_role, concept,
+                                  premises | second_premises)
+
+        for first, sup_role in self.chains_by_second.get(role.id, ()):
+            facts = self.facts_by_filler.get((first.id, sub_concept.id), {})
+            for concept, premise_sets in list(facts.items()):
+                for first_premises in list(premise_sets):
+                    self.add_fact(concept, sup_role, filler,
+                                  first_premises | premises)
+
+    def derive(self, sub_concept, existential, premises):
+        kb = self.kb
+        old_arrow = next((a for a in sub_concept.sup_arrows
+                          if a.concept is existential and a.role is kb.is_a),
+                         None)
+        premise_sets = [frozenset(old_premises) for old_premises in
+                        (() if old_arrow is None else old_arrow.premise_sets)]
+        if not add_premises(premise_sets, premises):
+            return
+
+        derivations = tuple(sorted(tuple(sorted(premise_set))
+                                   for premise_set in premise_sets))
+        if old_arrow is None or old_arrow.is_derived:
+            is_certain = derivations == ((),)
+            arrow = Arrow(existential, kb.is_a,
+                          -1 if is_certain else min(map(min, derivations)),
+                          is_derived=True,
+                          derivations=None if is_certain else derivations)
+        else:
+            # an asserted arrow keeps its own PBox id beside the derivations
+            arrow = Arrow(existential, kb.is_a, old_arrow.pbox_id,
+                          derivations=tuple(
+                              derivation for derivation in derivations
+                              if derivation != (old_arrow.pbox_id,)))
+
+        self.is_updating = True
+        if old_arrow is not None:
+            kb.remove_arrow(sub_concept, old_arrow)
+        kb.add_arrow(sub_concept, arrow)
+        self.is_updating = False
+        if arrow.is_derived:
+            if old_arrow is not None:
+                self.derived_arrows.remove((sub_concept, old_arrow))
+            self.derived_arrows += [(sub_concept, arrow)]
+        elif old_arrow.derivations is None:
+            self.extended_arrows += [(sub_concept, arrow)]
+        # the new derivations reach what the arrow reaches
+        self.arrows.append((sub_concept, arrow))
+
+
+def add_premises(premise_sets, premises):
+    """Adds ``premises`` to the ``premise_sets`` no one of which contains
+    another, and returns False when one of them is within ``premises``."""
+    if any(premise_set <= premises for premise_set in premise_sets):
+        return False
+    premise_sets[:] = [premise_set for premise_set in premise_sets
+                       if not premises <= premise_set]
+    premise_sets.append(premises)
+    return True
@@ -0,0 +1,269 @@
+import mmap
+import os
+import numpy as np
+from .concepts import (
+    Concept,
+    EmptyConcept,
+    GeneralConcept,
+    ExistentialConcept,
+    IndividualConcept,
+    InitialConcept,
+)
+
+MAGIC = b'GELSNAP\x00'
+VERSION = 3
+
+# the position of a class is the kind stored for its concepts
+CONCEPT_KINDS = (Concept, EmptyConcept, GeneralConcept, IndividualConcept,
+                 ExistentialConcept, InitialConcept)
+KIND_IDS = {concept_class: kind for kind, concept_class in
+            enumerate(CONCEPT_KINDS)}
+
+# every section is a flat little-endian array, stored in this order
+SECTIONS = (
+    ('concept_kinds', np.int8),
+    ('concept_iri_offsets', np.int64),
+    ('concept_iri_bytes', np.uint8),
+    ('existential_roles', np.int32),
+    ('existential_fillers', np.int32),
+    ('role_iri_offsets', np.int64),
+    ('role_iri_bytes', np.uint8),
+    ('subs', np.int32),
+    ('roles', np.int32),
+    ('sups', np.int32),
+    ('pbox_ids', np.int64),
+    ('inclusions', np.int32),
+    ('derived_subs', np.int32),
+    ('derived_roles', np.int32),
+    ('derived_sups', np.int32),
+    ('premise_offsets', np.int64),
+    ('premise_ids', np.int64),
+)
+
+ALIGNMENT = 8
+
+
+class Snapshot:
+    """Read-only view of a knowledge base snapshot file.
+
+    The file is memory-mapped and every section is a NumPy array over the
+    mapping, so opening a snapshot reads only its header. IRIs are
+    decoded and ``Concept`` objects built only when asked for, and the
+    concepts are kept once built.
+
+    Concept and role ids are those of the saved knowledge base: ``init``,
+    ``bot`` and ``top`` are the concepts 0, 1 and 2, and ``is a`` is the
+    role 0. The roles past ``role_count`` are only named by role
+    inclusions. The arrows exclude the derived ones, which are kept apart
+    with the PBox ids of their uncertain premises in ``premise_ids``,
+    sliced by ``premise_offsets``, one row per derivation. Each inclusion is a
+    ``(first, second, sup)`` row of role ids, with ``second`` -1 unless it
+    is a role chain.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f'Not a knowledge base snapshot: {path}')
+
+        header = np.frombuffer(self._mmap, dtype='<i8',
+                               count=2 + 2 * len(SECTIONS), offset=len(MAGIC))
+        version, self.role_count = header[:2].tolist()
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError(f'Unsupported snapshot version: {version}')
+
+        for (name, dtype), (offset, count) in zip(
+                SECTIONS, header[2:].reshape(-1, 2).tolist()):
+            setattr(self, name, np.frombuffer(
+                self._mmap, dtype=np.dtype(dtype).newbyteorder('<'),
+                count=count, offset=offset))
+        self.inclusions = self.inclusions.reshape(-1, 3)
+        self._concepts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # the arrays are views of the mapping, so they go first
+        for name, _ in SECTIONS:
+            setattr(self, name, None)
+        self._concepts = {}
+        self._mmap.close()
+
+    @property
+    def concept_count(self):
+        return len(self.concept_kinds)
+
+    @property
+    def arrow_count(self):
+        return len(self.subs)
+
+    @property
+    def derived_arrow_count(self):
+        return len(self.derived_subs)
+
+    def get_concept_iri(self, concept_id):
+        return get_string(self.concept_iri_offsets, self.concept_iri_bytes,
+                          concept_id)
+
+    def get_role_iri(self, role_id):
+        return get_string(self.role_iri_offsets, self.role_iri_bytes,
+                          role_id)
+
+    def get_concept(self, concept_id):
+        if concept_id not in self._concepts:
+            concept_class = CONCEPT_KINDS[self.concept_kinds[concept_id]]
+            if concept_class is ExistentialConcept:
+                concept = ExistentialConcept(
+                    self.get_role_iri(self.existential_roles[concept_id]),
+                    self.get_concept_iri(
+                        self.existential_fillers[concept_id]))
+            else:
+                concept = concept_class(self.get_concept_iri(concept_id))
+            concept.id = concept_id
+            self._concepts[concept_id] = concept
+        return self._concepts[concept_id]
+
+
+def is_snapshot(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def get_string(offsets, data, index):
+    return bytes(data[offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+
+def save_snapshot(kb, path):
+    concepts = kb.concepts
+    roles = kb.roles
+    role_ids = {role.iri: role.id for role in roles}
+    role_iris = [role.iri for role in roles]
+
+    def get_role_id(role_iri):
+        # inclusions may name roles that were never added
+        if role_iri not in role_ids:
+            role_ids[role_iri] = len(role_iris)
+            role_iris.append(role_iri)
+        return role_ids[role_iri]
+
+    kinds = np.array([get_kind(concept) for concept in concepts],
+                     dtype=np.int8)
+    existential_roles = np.full(len(concepts), -1, dtype=np.int32)
+    existential_fillers = np.full(len(concepts), -1, dtype=np.int32)
+    for concept in concepts:
+        if isinstance(concept, ExistentialConcept):
+            existential_roles[concept.id] = kb.get_role(concept.role_iri).id
+            existential_fillers[concept.id] = \
+                kb.get_concept(concept.concept_iri).id
+
+    arrows = [(concept.id, arrow.role.id, arrow.concept.id, arrow.pbox_id)
+              for concept in concepts for arrow in concept.sup_arrows
+              if not arrow.is_derived]
+    subs, arrow_roles, sups, pbox_ids = get_columns(
+        arrows, (np.int32, np.int32, np.int32, np.int64))
+
+    # one row per derivation; an asserted arrow has its own row above
+    derived_arrows = [
+        (concept, arrow, premises) for concept in concepts
+        for arrow in concept.sup_arrows
+        for premises in (arrow.premise_sets if arrow.is_derived else
+                         arrow.derivations or ())]
+    derived_subs, derived_roles, derived_sups = get_columns(
+        [(concept.id, arrow.role.id, arrow.concept.id)
+         for concept, arrow, _ in derived_arrows],
+        (np.int32, np.int32, np.int32))
+    premise_offsets = np.zeros(len(derived_arrows) + 1, dtype=np.int64)
+    np.cumsum([len(premises) for _, _, premises in derived_arrows],
+              out=premise_offsets[1:])
+    premise_ids = np.array([pbox_id for _, _, premises in derived_arrows
+                            for pbox_id in premises], dtype=np.int64)
+
+    inclusions = []
+    for sub_roles, sup_roles in kb.role_inclusions.items():
+        first, second = sub_roles if isinstance(sub_roles, tuple) else \
+            (sub_roles, None)
+        for sup_role in sup_roles:
+            inclusions += [(get_role_id(first),
+                            -1 if second is None else get_role_id(second),
+                            sup_role.id)]
+
+    concept_iri_offsets, concept_iri_bytes = get_string_table(
+        [concept.iri for concept in concepts])
+    role_iri_offsets, role_iri_bytes = get_string_table(role_iris)
+    sections = {
+        'concept_kinds': kinds,
+        'concept_iri_offsets': concept_iri_offsets,
+        'concept_iri_bytes': concept_iri_bytes,
+        'existential_roles': existential_roles,
+        'existential_fillers': existential_fillers,
+        'role_iri_offsets': role_iri_offsets,
+        'role_iri_bytes': role_iri_bytes,
+        'subs': subs,
+        'roles': arrow_roles,
+        'sups': sups,
+        'pbox_ids': pbox_ids,
+        'inclusions': np.array(inclusions, dtype=np.int32).reshape(-1),
+        'derived_subs': derived_subs,
+        'derived_roles': derived_roles,
+        'derived_sups': derived_sups,
+        'premise_offsets': premise_offsets,
+        'premise_ids': premise_ids,
+    }
+    write_sections(path, len(roles), sections)
+
+
+def get_kind(concept):
+    concept_class = type(concept)
+    if concept_class not in KIND_IDS:
+        raise ValueError(f'No snapshot kind for {concept_class.__name__}: '
+                         f'{concept.iri}')
+    return KIND_IDS[concept_class]
+
+
+def get_columns(rows, dtypes):
+    columns = zip(*rows) if rows else [()] * len(dtypes)
+    return tuple(np.array(column, dtype=dtype)
+                 for column, dtype in zip(columns, dtypes))
+
+
+def get_string_table(strings):
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def write_sections(path, role_count, sections):
+    header_size = len(MAGIC) + 8 * (2 + 2 * len(SECTIONS))
+    header = [VERSION, role_count]
+    arrays = []
+    offset = get_aligned(header_size)
+    for name, dtype in SECTIONS:
+        array = np.ascontiguousarray(
+            sections[name], dtype=np.dtype(dtype).newbyteorder('<'))
+        header += [offset, len(array)]
+        arrays += [(offset, array)]
+        offset = get_aligned(offset + array.nbytes)
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.array(header, dtype='<i8').tobytes())
+        for section_offset, array in arrays:
+            file.write(bytes(section_offset - file.tell()))
+            file.write(array.tobytes())
+        # so even an empty last section lies within the file
+        file.write(bytes(offset - file.tell()))
+
+
+def get_aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
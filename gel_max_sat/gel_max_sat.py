@@ -1,14 +1,160 @@
-from copy import deepcopy
+from array import array
 from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from itertools import accumulate
+from time import perf_counter
+import numpy as np
+from .gel.snapshot import Snapshot
+from .max_flow import TimeBudgetExceeded, get_algorithm
+from .stats import SolveStats, timed
 
 
 def is_satisfiable(kb, weights):
-    return solve(kb, weights)['success']
-
-
-def solve(kb, weights):
-    weighted_graph = WeightedGraph(kb, weights)
-    cut_set = min_cut(weighted_graph)
+    weights = [] if weights is None else weights
+    for pbox_id in kb.pbox_axioms:
+        check_pbox_id(pbox_id, weights)
+    kb.saturate()
+    return get_certain_chain(kb) is None
+
+
+def get_certain_chain(kb):
+    """Returns a chain of certain axioms from ``init`` to ``bot``, if any.
+
+    Only certain arrows have infinite weight, so such a chain is exactly
+    what makes the knowledge base unsatisfiable, once ``kb`` is
+    saturated. The chain is a list of ``(sub_concept, sup_arrow)`` pairs,
+    or None when there is no chain.
+    """
+    parent = {kb.init: None}
+    queue = deque([kb.init])
+    while len(queue) > 0 and kb.bot not in parent:
+        concept = queue.pop()
+        for arrow in concept.sup_arrows:
+            if arrow.is_certain and arrow.concept not in parent:
+                parent[arrow.concept] = (concept, arrow)
+                queue.appendleft(arrow.concept)
+
+    if kb.bot not in parent:
+        return None
+
+    chain = []
+    concept = kb.bot
+    while parent[concept] is not None:
+        chain += [parent[concept]]
+        concept = parent[concept][0]
+    return chain[::-1]
+
+
+def solve(kb, weights, algorithm='edmonds-karp', reduce=False,
+          processes=None, stats=False, time_budget=None):
+    """Finds the PBox axioms of least total weight whose removal makes
+    ``kb`` satisfiable.
+
+    ``kb`` may also be a ``gel.Snapshot``, whose arrays the graph is then
+    built from without loading the knowledge base.
+
+    With ``time_budget`` seconds, the max-flow engine stops once the
+    budget is spent and the result gains ``approximate``, ``lower_bound``
+    and ``upper_bound``. The bounds are on the weight of the excluded
+    axioms that are not negative; they are equal when the solve finished
+    in time, and left out when ``kb`` is unsatisfiable. When it did not,
+    the axioms returned come from the cheapest cut found in the residual
+    graph, whose weight is ``upper_bound``.
+    """
+    if time_budget is not None:
+        if processes is not None:
+            raise ValueError('time_budget cannot be used with processes')
+        deadline = perf_counter() + time_budget
+
+    stats = SolveStats() if stats else None
+    with timed(stats, 'build'):
+        weighted_graph = get_weighted_graph(kb, weights)
+    if reduce:
+        from .reduction import reduce_graph
+        with timed(stats, 'reduce'):
+            weighted_graph = reduce_graph(weighted_graph)
+
+    bounds = None
+    if time_budget is not None:
+        cut_set, bounds = min_cut_anytime(weighted_graph, algorithm,
+                                          deadline, stats)
+    elif processes is None:
+        cut_set = min_cut(weighted_graph, algorithm, stats)
+    else:
+        from .decomposition import min_cut_parallel
+        with timed(stats, 'parallel'):
+            cut_set = min_cut_parallel(weighted_graph, algorithm, processes)
+
+    result = get_result(cut_set)
+    if bounds is not None and result['success']:
+        lower_bound, upper_bound = bounds
+        result['approximate'] = lower_bound < upper_bound
+        result['lower_bound'] = lower_bound
+        result['upper_bound'] = upper_bound
+    if reduce:
+        result['reduction'] = weighted_graph.reduction
+    if stats is not None:
+        stats.order = weighted_graph.order
+        stats.size = weighted_graph.size
+        result['stats'] = stats
+    return result
+
+
+def solve_many(kb, weights_matrix, algorithm='edmonds-karp', processes=None):
+    """Solves ``kb`` once for every row of ``weights_matrix``.
+
+    The graph topology is built a single time and each row only swaps in
+    new capacities. With ``processes``, rows are spread over a process
+    pool. Results are returned in row order.
+    """
+    weights_matrix = np.asarray(weights_matrix)
+    if weights_matrix.ndim != 2:
+        raise ValueError('weights_matrix must be a 2-D array, '
+                         f'got {weights_matrix.ndim} dimension(s)')
+
+    rows = weights_matrix.tolist()
+    if len(rows) == 0:
+        return []
+
+    weighted_graph = get_weighted_graph(kb, rows[0])
+    if processes is None:
+        return [solve_weighted_graph(weighted_graph, weights, algorithm)
+                for weights in rows]
+
+    chunksize = max(1, len(rows) // (4 * processes))
+    with ProcessPoolExecutor(max_workers=processes,
+                             initializer=_init_worker,
+                             initargs=(weighted_graph, algorithm)) as pool:
+        return list(pool.map(_solve_worker_row, rows, chunksize=chunksize))
+
+
+def get_weighted_graph(kb, weights):
+    if isinstance(kb, Snapshot):
+        return WeightedGraph.from_snapshot(kb, weights)
+    kb.saturate()
+    return WeightedGraph(kb, weights)
+
+
+def solve_weighted_graph(weighted_graph, weights, algorithm='edmonds-karp'):
+    cut_set = min_cut(weighted_graph.with_weights(weights), algorithm)
+    return get_result(cut_set)
+
+
+_worker_problem = None
+
+
+def _init_worker(weighted_graph, algorithm):
+    global _worker_problem
+    _worker_problem = (weighted_graph, algorithm)
+
+
+def _solve_worker_row(weights):
+    weighted_graph, algorithm = _worker_problem
+    return solve_weighted_graph(weighted_graph, weights, algorithm)
+
+
+def get_result(cut_set):
     if cut_set.has_infinity_weight:
         return {'success': False}
 
@@ -16,86 +162,209 @@ def solve(kb, weights):
             'prob_axiom_indexes': cut_set.prob_axiom_indexes}
 
 
-def min_cut(weighted_graph):
+def min_cut(weighted_graph, algorithm='edmonds-karp', stats=None):
     s = weighted_graph.init
     t = weighted_graph.bottom
 
-    residual_graph = deepcopy(weighted_graph)
+    max_flow = get_algorithm(algorithm)
+    with timed(stats, 'copy'):
+        residual = weighted_graph.residual()
+    with timed(stats, 'augment'):
+        flow = max_flow(weighted_graph, residual, s, t, stats)
+
+    with timed(stats, 'dfs'):
+        visited = dfs(weighted_graph, residual, s, stats)
+    with timed(stats, 'cut_set'):
+        cut_set = get_cut_set(weighted_graph, visited)
+    if stats is not None:
+        stats.flow = flow
+    return cut_set
 
-    is_there_augment_path, path = get_augment_path(residual_graph, s, t)
-    while is_there_augment_path:
-        augment_flow = get_augment_flow(path, residual_graph)
-        update_path_weights(path, residual_graph, augment_flow)
 
-        is_there_augment_path, path = get_augment_path(residual_graph, s, t)
+def min_cut_anytime(weighted_graph, algorithm, deadline, stats=None):
+    s = weighted_graph.init
+    t = weighted_graph.bottom
 
-    visited = dfs(residual_graph, s)
-    cut_set = get_cut_set(weighted_graph, visited)
-    return cut_set
+    max_flow = get_algorithm(algorithm)
+    with timed(stats, 'copy'):
+        residual = weighted_graph.residual()
+    try:
+        with timed(stats, 'augment'):
+            flow = max_flow(weighted_graph, residual, s, t, stats, deadline)
+    except TimeBudgetExceeded as exceeded:
+        with timed(stats, 'cut_set'):
+            visited, cut_weight = get_layered_cut(weighted_graph, residual)
+            cut_set = get_cut_set(weighted_graph, visited)
+        if stats is not None:
+            stats.flow = exceeded.flow
+        return cut_set, (exceeded.flow, cut_weight)
+
+    with timed(stats, 'dfs'):
+        visited = dfs(weighted_graph, residual, s, stats)
+    with timed(stats, 'cut_set'):
+        cut_set = get_cut_set(weighted_graph, visited)
+    if stats is not None:
+        stats.flow = flow
+    return cut_set, (flow, flow)
+
+
+def get_layered_cut(weighted_graph, residual):
+    """Returns the cheapest cut between two BFS layers of ``residual``.
+
+    The vertices at most ``k`` residual arrows away from ``init`` form a
+    cut while ``k`` is below the distance to ``bot``, and so do the ones
+    more than ``k`` arrows away from reaching ``bot``. The layers follow
+    the arrows saturated so far: the first kind suits augmenting path
+    engines, the second the preflow left by push-relabel. Both kinds are
+    weighed in a single pass over the arrows each.
+
+    Only layers crossed by no certain arrow are taken. When every layer
+    is crossed by one, the cut is the set of uncertain arrows leaving the
+    concepts that ``init`` reaches through certain arrows, which is
+    finite whenever the knowledge base is satisfiable. When they include
+    ``bot`` it is not, and the cut takes the certain arrows into ``bot``.
+    """
+    graph = weighted_graph
+    s, t = graph.init, graph.bottom
+    visited, weight = None, graph.infinity
+
+    from_init = get_distances(graph, residual, s)
+    k, from_init_weight = get_lightest_layer(graph, from_init, t)
+    if k is not None:
+        visited = [0 <= d <= k for d in from_init]
+        weight = from_init_weight
+
+    to_bot = get_distances(graph, residual, t, backward=True)
+    k, to_bot_weight = get_lightest_layer(graph, to_bot, s, backward=True)
+    if k is not None and to_bot_weight < weight:
+        visited = [not 0 <= d <= k for d in to_bot]
+        weight = to_bot_weight
+
+    if visited is None:
+        visited, weight = get_certain_closure(graph)
+    return visited, weight
+
+
+def get_certain_closure(weighted_graph):
+    graph = weighted_graph
+    capacities = graph.capacities
+    infinity = graph.infinity
+
+    visited = [False] * graph.order
+    visited[graph.init] = True
+    stack = [graph.init]
+    while len(stack) > 0:
+        u = stack.pop()
+        for edge in range(graph.offsets[u], graph.offsets[u + 1]):
+            v = graph.heads[edge]
+            if not visited[v] and capacities[edge] >= infinity:
+                visited[v] = True
+                stack += [v]
 
+    if visited[graph.bottom]:
+        visited[graph.bottom] = False
+        return visited, infinity
 
-def get_augment_path(residual_graph, s, t):
-    def get_path(parent, s, t):
-        v = t
-        while v != s:
-            yield (parent[v], v)
-            v = parent[v]
+    weight = sum(capacities[edge]
+                 for u, edge in zip(graph.arrow_tails, graph.arrow_edges)
+                 if visited[u] and not visited[graph.heads[edge]])
+    return visited, weight
 
-    visited = [False] * residual_graph.order
-    parent = [0] * residual_graph.order
 
-    queue = deque([s])
-    visited[s] = True
-    parent[s] = -1
+def get_distances(weighted_graph, residual, root, backward=False):
+    offsets = weighted_graph.offsets
+    heads = weighted_graph.heads
+    reverse = weighted_graph.reverse
 
+    distance = [-1] * weighted_graph.order
+    distance[root] = 0
+    queue = deque([root])
     while len(queue) > 0:
         u = queue.pop()
-        for arrow in residual_graph.adj[u]:
-            v = arrow.vertex
-            if not visited[v] and arrow.weight > 0:
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = heads[edge]
+            capacity = residual[reverse[edge] if backward else edge]
+            if distance[v] < 0 and capacity > 0:
+                distance[v] = distance[u] + 1
                 queue.appendleft(v)
+    return distance
+
+
+def get_lightest_layer(weighted_graph, distance, target, backward=False):
+    graph = weighted_graph
+    last = distance[target]
+    if last < 0:
+        last = max(distance) + 1
+
+    # an arrow crosses the cut of every layer from the distance of its
+    # near end up to, but not including, the distance of its far end
+    weight_changes = [0] * (last + 1)
+    certain_changes = [0] * (last + 1)
+    for u, edge in zip(graph.arrow_tails, graph.arrow_edges):
+        v = graph.heads[edge]
+        if backward:
+            u, v = v, u
+        start = distance[u]
+        end = last if distance[v] < 0 else min(distance[v], last)
+        if 0 <= start < end:
+            if graph.capacities[edge] >= graph.infinity:
+                certain_changes[start] += 1
+                certain_changes[end] -= 1
+            else:
+                weight_changes[start] += graph.capacities[edge]
+                weight_changes[end] -= graph.capacities[edge]
+
+    layer_weights = list(accumulate(weight_changes[:last]))
+    layers = [k for k, count in enumerate(accumulate(certain_changes[:last]))
+              if count == 0]
+    if len(layers) == 0:
+        return None, graph.infinity
+    k = min(layers, key=layer_weights.__getitem__)
+    return k, layer_weights[k]
+
+
+def dfs(weighted_graph, residual, s, stats=None):
+    offsets = weighted_graph.offsets
+    heads = weighted_graph.heads
+
+    visited = [False] * weighted_graph.order
+    visited[s] = True
+    stack = [s]
+    searched = 0
+    edge_visits = 0
+    while len(stack) > 0:
+        u = stack.pop()
+        searched += 1
+        edge_visits += offsets[u + 1] - offsets[u]
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = heads[edge]
+            if not visited[v] and residual[edge] > 0:
                 visited[v] = True
-                parent[v] = u
-
-    return visited[t], list(get_path(parent, s, t))
+                stack += [v]
 
-
-def get_augment_flow(path, residual_graph):
-    return min(
-        (residual_graph.get_weight(u, v) for u, v in path),
-        default=residual_graph.infinity
-    )
-
-
-def update_path_weights(path, residual_graph, augment_flow):
-    for u, v in path:
-        residual_graph.increment_weight(u, v, -augment_flow)
-        residual_graph.increment_weight(v, u, +augment_flow)
-
-
-def dfs(residual_graph, s):
-    def _dfs(residual_graph, v, visited):
-        visited[v] = True
-        for a in residual_graph.adj[v]:
-            u = a.vertex
-            if not visited[u] and residual_graph.get_weight(v, u) > 0:
-                _dfs(residual_graph, u, visited)
-
-    visited = [False] * residual_graph.order
-    _dfs(residual_graph, s, visited)
+    if stats is not None:
+        stats.count_search(searched, edge_visits)
     return visited
 
 
 def get_cut_set(weighted_graph, visited):
     has_infinity_weight = False
-    prob_axiom_indexes = weighted_graph.negative_arrows
-
-    for v, arrows in enumerate(weighted_graph.adj):
-        for arrow in arrows:
-            if visited[v] and not visited[arrow.vertex]:
-                if arrow.prob_axiom_index < 0:
-                    has_infinity_weight = True
-                prob_axiom_indexes += [arrow.prob_axiom_index]
+    prob_axiom_indexes = list(weighted_graph.negative_arrows)
+    negative_arrows = set(weighted_graph.negative_arrows)
+
+    heads = weighted_graph.heads
+    tails = weighted_graph.arrow_tails
+    arrow_edges = weighted_graph.arrow_edges
+    for arrow in range(weighted_graph.size):
+        if not visited[tails[arrow]] or visited[heads[arrow_edges[arrow]]]:
+            continue
+
+        for pbox_id in weighted_graph.get_pbox_ids(arrow):
+            if pbox_id in negative_arrows:
+                continue
+            if pbox_id < 0:
+                has_infinity_weight = True
+            prob_axiom_indexes += [pbox_id]
 
     CutSet = namedtuple('CutSet', [
         'has_infinity_weight',
@@ -104,74 +373,281 @@ def get_cut_set(weighted_graph, visited):
 
 
 class WeightedGraph:
-    class Arrow:
-        def __init__(self, vertex, weight, prob_axiom_index):
-            self.vertex = vertex
-            self.weight = weight
-            self.prob_axiom_index = prob_axiom_index
-
-        def __repr__(self):
-            return f'({self.vertex}, {self.weight}, {self.prob_axiom_index})'
-
-    def __init__(self, kb, weights):
+    """Residual graph of a knowledge base in compressed sparse row form.
+
+    Each arrow ``u -> v`` owns a forward edge in the adjacency slice
+    ``offsets[u]:offsets[u + 1]`` and a reverse edge in the slice of ``v``,
+    and ``reverse`` maps each edge to its twin, so reading or updating a
+    residual capacity is a single array access. Parallel arrows keep
+    their own edges and PBox ids.
+
+    A derived arrow with several uncertain premises keeps their PBox ids
+    in ``premises``. It is removed by removing any one of them, so its
+    capacity is the weight of the lightest, and a cut through it excludes
+    that one. An arrow with several derivations becomes parallel arrows,
+    one per derivation, so a cut has to remove each of them.
+
+    The graph is built from the arrows ``kb`` has, so the knowledge base
+    must be saturated first for the derived arrows to be in it, or from
+    a ``Snapshot``, which holds them. The graph
+    itself is never modified by a solve: flows are computed on a separate
+    capacity buffer from ``residual``, so one graph can be shared between
+    any number of solves.
+
+    With ``spare_slots``, every vertex gets that many free edges at the
+    end of its slice, so ``insert_arrow`` and ``delete_arrow`` can edit
+    the graph in place. A free edge points back to its own vertex and is
+    its own twin, with no capacity, so no search ever follows it.
+    """
+
+    def __init__(self, kb, weights, spare_slots=0):
         indexes = {j.iri: i for i, j in enumerate(kb.concepts)}
-        weights = [] if weights is None else weights
 
         self.order = len(kb.concepts)
-        self.infinity = max(weights) + 1 if len(weights) > 0 else 1
-
         self.init = indexes[kb.init.iri]
         self.bottom = indexes[kb.bot.iri]
-        self.negative_arrows = []
 
-        self.adj = [[] for _ in range(self.order)]
+        tails = array('i')
+        heads = array('i')
+        pbox_ids = array('i')
+        premises = {}
+        for concept in kb.concepts:
+            vertex_1 = indexes[concept.iri]
+            for a in concept.sup_arrows:
+                for arrow_premises in get_arrow_premises(a):
+                    if len(arrow_premises) > 1:
+                        premises[len(pbox_ids)] = arrow_premises
+                    tails.append(vertex_1)
+                    heads.append(indexes[a.concept.iri])
+                    pbox_ids.append(arrow_premises[0])
+
+        self._build(tails, heads, pbox_ids, premises, spare_slots)
+        self._assign_weights(weights)
+
+    @classmethod
+    def from_arrows(cls, order, init, bottom, tails, heads, pbox_ids,
+                    premises=None):
+        weighted_graph = cls.__new__(cls)
+        weighted_graph.order = order
+        weighted_graph.init = init
+        weighted_graph.bottom = bottom
+        weighted_graph._build(array('i', tails),
+                              array('i', heads),
+                              array('i', pbox_ids),
+                              premises)
+        return weighted_graph
+
+    @classmethod
+    def from_snapshot(cls, snapshot, weights):
+        """Builds the graph straight from the arrays of a ``Snapshot``.
+
+        The snapshot keeps the concept ids as vertices and holds the
+        derived arrows, so no concept is built and nothing is saturated.
+        """
+        weighted_graph = cls.__new__(cls)
+        weighted_graph.order = snapshot.concept_count
+        # init and bot are the concepts 0 and 1 of every snapshot
+        weighted_graph.init = 0
+        weighted_graph.bottom = 1
+
+        premise_offsets = snapshot.premise_offsets
+        premise_ids = snapshot.premise_ids
+        counts = np.diff(premise_offsets)
+        derived_pbox_ids = np.full(len(counts), -1, dtype=np.int64)
+        is_uncertain = counts > 0
+        if is_uncertain.any():
+            derived_pbox_ids[is_uncertain] = np.minimum.reduceat(
+                premise_ids, premise_offsets[:-1][is_uncertain])
+        premises = {
+            snapshot.arrow_count + arrow: tuple(
+                premise_ids[premise_offsets[arrow]:
+                            premise_offsets[arrow + 1]].tolist())
+            for arrow in np.flatnonzero(counts > 1).tolist()}
+
+        weighted_graph._build(
+            np.concatenate((snapshot.subs, snapshot.derived_subs)),
+            np.concatenate((snapshot.sups, snapshot.derived_sups)),
+            np.concatenate((snapshot.pbox_ids, derived_pbox_ids)),
+            premises)
+        weighted_graph._assign_weights(weights)
+        return weighted_graph
+
+    @property
+    def size(self):
+        return len(self.pbox_ids)
+
+    def get_pbox_ids(self, arrow):
+        premises = self.premises.get(arrow)
+        if premises is None:
+            return (self.pbox_ids[arrow],)
+        return (min(premises, key=self.weights.__getitem__),)
+
+    def get_premises(self, arrow):
+        return self.premises.get(arrow, (self.pbox_ids[arrow],))
+
+    def with_weights(self, weights):
+        weighted_graph = copy(self)
+        weighted_graph._assign_weights(weights)
+        return weighted_graph
+
+    def residual(self):
+        return array('d', self.capacities)
+
+    def reset_residual(self, residual):
+        residual[:] = self.capacities
+
+    def _build(self, tails, heads, pbox_ids, premises=None, spare_slots=0):
+        # the two ends of arrow i are the endpoints 2i and 2i + 1; a stable
+        # sort by vertex lays out every slice in arrow order
+        tails = np.asarray(tails, dtype=np.int32)
+        heads = np.asarray(heads, dtype=np.int32)
+        endpoints = np.empty(2 * len(tails), dtype=np.int32)
+        endpoints[0::2] = tails
+        endpoints[1::2] = heads
+        degrees = np.bincount(endpoints, minlength=self.order) + spare_slots
+        offsets = np.zeros(self.order + 1, dtype=np.int32)
+        np.cumsum(degrees, out=offsets[1:])
+
+        order = np.argsort(endpoints, kind='stable')
+        edges = np.empty(len(endpoints), dtype=np.int32)
+        edges[order] = np.arange(len(endpoints), dtype=np.int32) + \
+            spare_slots * endpoints[order]
+        forward_edges = edges[0::2]
+        reverse_edges = edges[1::2]
+
+        # free edges point back to their own vertex and are their own twin
+        all_heads = np.repeat(np.arange(self.order, dtype=np.int32), degrees)
+        all_heads[forward_edges] = heads
+        all_heads[reverse_edges] = tails
+        reverse = np.arange(offsets[-1], dtype=np.int32)
+        reverse[forward_edges] = reverse_edges
+        reverse[reverse_edges] = forward_edges
+
+        self.offsets = to_array(offsets)
+        self.heads = to_array(all_heads)
+        self.reverse = to_array(reverse)
+        self.arrow_tails = to_array(tails)
+        self.arrow_edges = to_array(forward_edges)
+        self.pbox_ids = to_array(np.asarray(pbox_ids, dtype=np.int32))
+        self.premises = {} if premises is None else premises
+        self.free_arrows = []
+
+    def add_vertex(self, spare_slots):
+        vertex = self.order
+        start = self.offsets[-1]
+        self.offsets.append(start + spare_slots)
+        self.heads.extend([vertex] * spare_slots)
+        self.reverse.extend(range(start, start + spare_slots))
+        self.capacities.extend([0] * spare_slots)
+        self.order += 1
+        return vertex
+
+    def insert_arrow(self, vertex_1, vertex_2, pbox_ids):
+        """Puts the arrow ``vertex_1 -> vertex_2`` in free edges and returns
+        its index, or None when either vertex has no free edge left.
+
+        The arrow takes the index of a deleted arrow when there is one.
+        Its capacity is left at 0.
+        """
+        edge = self.get_free_edge(vertex_1)
+        reverse_edge = self.get_free_edge(vertex_2, edge)
+        if edge is None or reverse_edge is None:
+            return None
+
+        self.heads[edge] = vertex_2
+        self.heads[reverse_edge] = vertex_1
+        self.reverse[edge] = reverse_edge
+        self.reverse[reverse_edge] = edge
+        if len(self.free_arrows) > 0:
+            arrow = self.free_arrows.pop()
+            self.arrow_tails[arrow] = vertex_1
+            self.arrow_edges[arrow] = edge
+        else:
+            arrow = self.size
+            self.arrow_tails.append(vertex_1)
+            self.arrow_edges.append(edge)
+            self.pbox_ids.append(-1)
+        self.set_premises(arrow, pbox_ids)
+        return arrow
+
+    def delete_arrow(self, arrow):
+        """Frees the edges of ``arrow``, whose index is kept for reuse.
+
+        A deleted arrow is certain, has no capacity and goes from its tail
+        to itself, so it is in no cut.
+        """
+        edge = self.arrow_edges[arrow]
+        reverse_edge = self.reverse[edge]
+        for free_edge, vertex in ((edge, self.arrow_tails[arrow]),
+                                  (reverse_edge, self.heads[edge])):
+            self.heads[free_edge] = vertex
+            self.reverse[free_edge] = free_edge
+            self.capacities[free_edge] = 0
+        self.set_premises(arrow, (-1,))
+        self.free_arrows += [arrow]
+
+    def get_free_edge(self, vertex, taken=None):
+        # spare edges are at the end of the slice, deleted ones anywhere
+        for edge in range(self.offsets[vertex + 1] - 1,
+                          self.offsets[vertex] - 1, -1):
+            if self.reverse[edge] == edge and edge != taken:
+                return edge
+        return None
+
+    def set_premises(self, arrow, pbox_ids):
+        self.pbox_ids[arrow] = pbox_ids[0]
+        if len(pbox_ids) > 1:
+            self.premises[arrow] = pbox_ids
+        else:
+            self.premises.pop(arrow, None)
+
+    def _assign_weights(self, weights):
+        weights = [] if weights is None else weights
+
+        self.weights = weights
+        self.infinity = get_infinity(weights)
+        self.capacities = array('d', bytes(8 * len(self.heads)))
+        self.negative_arrows = self.get_negative_arrows(weights)
 
-        def get_weight(arrow):
-            pbox_id = arrow.pbox_id
-            if pbox_id >= len(weights):
-                raise Exception(
-                    f'Invalid PBox ID: {pbox_id}. ' +
-                    f'You could define {pbox_id - len(weights) + 1}' +
-                    'more weights.')
+        for arrow, edge in enumerate(self.arrow_edges):
+            self.capacities[edge] = max(0, self.get_arrow_weight(arrow,
+                                                                 weights))
 
-            if pbox_id < 0:
-                return self.infinity
-            return weights[pbox_id]
+    def get_negative_arrows(self, weights):
+        # the premises of a derived arrow are the PBox ids of other arrows
+        return [pbox_id for pbox_id in self.pbox_ids
+                if pbox_id >= 0 and self.get_weight(pbox_id, weights) < 0]
 
-        for concept in kb.concepts:
-            for a in concept.sup_arrows:
-                weight = get_weight(a)
-
-                if weight < 0:
-                    self.negative_arrows += [a.pbox_id]
-                    continue
-
-                vertex_1 = indexes[concept.iri]
-                vertex_2 = indexes[a.concept.iri]
-                self.increment_weight(vertex_1, vertex_2, weight)
-                self.add_pbox_id(vertex_1, vertex_2, a.pbox_id)
-
-    def add_arrow(self, vertex_1, vertex_2, weight, pbox_id=-1):
-        for arrow in self.adj[vertex_1]:
-            if arrow.vertex == vertex_2:
-                arrow.weight = weight
-                return
-
-        arrow = self.Arrow(vertex_2, weight, pbox_id)
-        self.adj[vertex_1] += [arrow]
-
-    def get_weight(self, vertex_1, vertex_2):
-        for arrow in self.adj[vertex_1]:
-            if arrow.vertex == vertex_2:
-                return arrow.weight
-        return 0
-
-    def increment_weight(self, vertex_1, vertex_2, increment):
-        current_weight = self.get_weight(vertex_1, vertex_2)
-        self.add_arrow(vertex_1, vertex_2, current_weight + increment)
-
-    def add_pbox_id(self, vertex_1, vertex_2, pbox_id):
-        for arrow in self.adj[vertex_1]:
-            if arrow.vertex == vertex_2 and pbox_id != -1:
-                arrow.prob_axiom_index = pbox_id
-                return
+    def get_arrow_weight(self, arrow, weights):
+        return min(self.get_weight(pbox_id, weights)
+                   for pbox_id in self.get_premises(arrow))
+
+    def get_weight(self, pbox_id, weights):
+        check_pbox_id(pbox_id, weights)
+        if pbox_id < 0:
+            return self.infinity
+        return weights[pbox_id]
+
+
+def to_array(values):
+    return array('i', np.ascontiguousarray(values, dtype=np.int32).tobytes())
+
+
+def get_arrow_premises(arrow):
+    # the premises of each graph arrow ``arrow`` becomes, with -1 for a
+    # certain derivation
+    return [premises or (-1,) for premises in arrow.premise_sets]
+
+
+def check_pbox_id(pbox_id, weights):
+    if pbox_id >= len(weights):
+        raise Exception(
+            f'Invalid PBox ID: {pbox_id}. ' +
+            f'You could define {pbox_id - len(weights) + 1}' +
+            'more weights.')
+
+
+def get_infinity(weights):
+    # heavier than any cut made only of uncertain arrows, so a certain
+    # arrow is cut only when there is no other way
+    return sum(weight for weight in weights if weight > 0) + 1
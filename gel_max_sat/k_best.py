@@ -0,0 +1,128 @@
+from array import array
+from heapq import heappop, heappush
+from .gel_max_sat import WeightedGraph, dfs, get_cut_set
+from .max_flow import get_algorithm
+from .reduction import get_reached
+
+
+class ForcingGraph(WeightedGraph):
+    """WeightedGraph with an ``init -> v`` and a ``v -> bot`` arrow for
+    every vertex ``v`` that may be on either side of a cut.
+
+    The extra arrows start with no capacity, so they change no cut. Giving
+    one of them infinite capacity forces ``v`` to the side of ``init`` or
+    to the side of ``bot``. They stand for no axiom.
+    """
+
+    def get_pbox_ids(self, arrow):
+        if arrow < self.axioms_size:
+            return super().get_pbox_ids(arrow)
+        return ()
+
+
+def solve_k_best(kb, weights, k, algorithm='edmonds-karp'):
+    """Returns up to ``k`` repairs of ``kb``, lightest first.
+
+    Each repair is a dict with the keys of ``solve`` plus
+    ``excluded_weight``, the weight of the cut it comes from. Cuts are
+    enumerated with Lawler's partitioning over the side of each vertex:
+    every branch keeps the sides its parent fixed, forces one more vertex
+    across, and resumes from the parent's maximum flow, since forcing a
+    vertex only raises capacities. Cuts that exclude the same axioms are
+    reported once.
+    """
+    if k < 1:
+        raise ValueError(f'Invalid number of repairs: {k}')
+
+    kb.saturate()
+    graph = get_forcing_graph(WeightedGraph(kb, weights))
+    s, t = graph.init, graph.bottom
+    max_flow = get_algorithm(algorithm)
+
+    residual = graph.residual()
+    flow = max_flow(graph, residual, s, t)
+    if flow >= graph.infinity:
+        return [{'success': False}]
+
+    repairs = []
+    seen = set()
+    counter = 0
+    pending = [(flow, counter, frozenset(), residual)]
+    while len(pending) > 0 and len(repairs) < k:
+        flow, _, fixed, residual = heappop(pending)
+        visited = dfs(graph, residual, s)
+        cut_set = get_cut_set(graph, visited)
+        excluded = sorted(set(cut_set.prob_axiom_indexes))
+        if tuple(excluded) not in seen:
+            seen.add(tuple(excluded))
+            repairs += [{'success': True,
+                         'prob_axiom_indexes': excluded,
+                         'excluded_weight': flow}]
+
+        # the i-th branch keeps the free vertices before v where this cut
+        # put them, which costs no flow, and moves v to the other side
+        fixed_residual = array('d', residual)
+        for v in graph.free_vertices:
+            if v in fixed:
+                continue
+
+            branch_residual = array('d', fixed_residual)
+            force(graph, branch_residual, v, not visited[v])
+            branch_flow = flow + max_flow(graph, branch_residual, s, t)
+            if branch_flow < graph.infinity:
+                counter += 1
+                heappush(pending, (branch_flow, counter, fixed | {v},
+                                   branch_residual))
+
+            force(graph, fixed_residual, v, visited[v])
+            fixed = fixed | {v}
+
+    return repairs
+
+
+def force(forcing_graph, residual, v, to_init):
+    graph = forcing_graph
+    arrow = graph.init_arrows[v] if to_init else graph.bottom_arrows[v]
+    residual[graph.arrow_edges[arrow]] = graph.infinity
+
+
+def get_forcing_graph(weighted_graph):
+    graph = weighted_graph
+    s, t = graph.init, graph.bottom
+    arrow_heads = [graph.heads[edge] for edge in graph.arrow_edges]
+
+    # only the vertices on some path from init to bot change the axioms a
+    # cut excludes
+    successors = [[] for _ in range(graph.order)]
+    predecessors = [[] for _ in range(graph.order)]
+    for arrow, (u, v) in enumerate(zip(graph.arrow_tails, arrow_heads)):
+        if graph.capacities[graph.arrow_edges[arrow]] > 0:
+            successors[u] += [v]
+            predecessors[v] += [u]
+    reached = get_reached(successors, s)
+    co_reached = get_reached(predecessors, t)
+    free_vertices = [v for v in range(graph.order)
+                     if reached[v] and co_reached[v] and v not in (s, t)]
+
+    size = graph.size
+    tails = list(graph.arrow_tails) + [s] * len(free_vertices) + \
+        free_vertices
+    heads = arrow_heads + free_vertices + [t] * len(free_vertices)
+    pbox_ids = list(graph.pbox_ids) + [-1] * (2 * len(free_vertices))
+
+    forcing_graph = ForcingGraph.from_arrows(graph.order, s, t, tails,
+                                             heads, pbox_ids, graph.premises)
+    forcing_graph.axioms_size = size
+    forcing_graph.free_vertices = free_vertices
+    forcing_graph.init_arrows = {
+        v: size + i for i, v in enumerate(free_vertices)}
+    forcing_graph.bottom_arrows = {
+        v: size + len(free_vertices) + i for i, v in enumerate(free_vertices)}
+    forcing_graph.weights = graph.weights
+    forcing_graph.infinity = graph.infinity
+    forcing_graph.negative_arrows = list(graph.negative_arrows)
+    forcing_graph.capacities = array('d', bytes(16 * len(tails)))
+    for arrow in range(size):
+        forcing_graph.capacities[forcing_graph.arrow_edges[arrow]] = \
+            graph.capacities[graph.arrow_edges[arrow]]
+    return forcing_graph
@@ -0,0 +1,296 @@
+from collections import deque
+from time import perf_counter
+from .sparse_flow import scipy_max_flow
+
+
+# relative to the infinite weight, so it scales with the weights
+TOLERANCE = 1e-12
+
+
+class TimeBudgetExceeded(Exception):
+    """Raised by an engine that stops at its deadline.
+
+    ``flow`` is the value sent to the sink so far. The residual buffer is
+    left as it was when the engine stopped.
+    """
+
+    def __init__(self, flow):
+        super().__init__(f'Time budget exceeded with flow {flow}')
+        self.flow = flow
+
+
+def check_deadline(deadline, flow):
+    if deadline is not None and perf_counter() > deadline:
+        raise TimeBudgetExceeded(flow)
+
+
+def edmonds_karp(graph, residual, s, t, stats=None, deadline=None):
+    flow = 0
+    is_there_augment_path, path = get_augment_path(graph, residual, s, t,
+                                                   stats)
+    while is_there_augment_path:
+        check_deadline(deadline, flow)
+        augment_flow = get_augment_flow(graph, residual, path)
+        update_path_weights(graph, residual, path, augment_flow)
+        flow += augment_flow
+        if stats is not None:
+            stats.augmenting_paths += 1
+
+        is_there_augment_path, path = get_augment_path(graph, residual, s, t,
+                                                       stats)
+    return flow
+
+
+def get_augment_path(graph, residual, s, t, stats=None):
+    def get_path(parent_edge, s, t):
+        v = t
+        while v != s:
+            edge = parent_edge[v]
+            yield edge
+            v = heads[reverse[edge]]
+
+    offsets = graph.offsets
+    heads = graph.heads
+    reverse = graph.reverse
+
+    visited = [False] * graph.order
+    parent_edge = [-1] * graph.order
+
+    queue = deque([s])
+    visited[s] = True
+
+    searched = 0
+    edge_visits = 0
+    while len(queue) > 0 and not visited[t]:
+        u = queue.pop()
+        searched += 1
+        edge_visits += offsets[u + 1] - offsets[u]
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = heads[edge]
+            if not visited[v] and residual[edge] > 0:
+                queue.appendleft(v)
+                visited[v] = True
+                parent_edge[v] = edge
+
+    if stats is not None:
+        stats.count_search(searched, edge_visits)
+    if not visited[t]:
+        return False, []
+    return True, list(get_path(parent_edge, s, t))
+
+
+def get_augment_flow(graph, residual, path):
+    return min((residual[edge] for edge in path),
+               default=graph.infinity)
+
+
+def update_path_weights(graph, residual, path, augment_flow):
+    reverse = graph.reverse
+    for edge in path:
+        residual[edge] -= augment_flow
+        residual[reverse[edge]] += augment_flow
+
+
+def dinic(graph, residual, s, t, stats=None, deadline=None):
+    flow = 0
+    level = get_levels(graph, residual, s, stats)
+    while level[t] >= 0:
+        next_edge = list(graph.offsets)
+        path = get_blocking_path(graph, residual, level, next_edge, s, t)
+        while path:
+            check_deadline(deadline, flow)
+            augment_flow = get_augment_flow(graph, residual, path)
+            update_path_weights(graph, residual, path, augment_flow)
+            flow += augment_flow
+            if stats is not None:
+                stats.augmenting_paths += 1
+            path = get_blocking_path(graph, residual, level, next_edge, s, t)
+        level = get_levels(graph, residual, s, stats)
+    return flow
+
+
+def get_levels(graph, residual, s, stats=None):
+    offsets = graph.offsets
+    heads = graph.heads
+
+    level = [-1] * graph.order
+    level[s] = 0
+
+    queue = deque([s])
+    searched = 0
+    edge_visits = 0
+    while len(queue) > 0:
+        u = queue.pop()
+        searched += 1
+        edge_visits += offsets[u + 1] - offsets[u]
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = heads[edge]
+            if level[v] < 0 and residual[edge] > 0:
+                level[v] = level[u] + 1
+                queue.appendleft(v)
+
+    if stats is not None:
+        stats.count_search(searched, edge_visits)
+    return level
+
+
+def get_blocking_path(graph, residual, level, next_edge, s, t):
+    # walks the level graph advancing each vertex's current edge, so every
+    # dead end is discarded only once per phase
+    offsets = graph.offsets
+    heads = graph.heads
+    reverse = graph.reverse
+
+    path = []
+    u = s
+    while u != t:
+        end = offsets[u + 1]
+        edge = next_edge[u]
+        while edge < end and not (residual[edge] > 0 and
+                                  level[heads[edge]] == level[u] + 1):
+            edge += 1
+        next_edge[u] = edge
+
+        if edge < end:
+            path += [edge]
+            u = heads[edge]
+            continue
+
+        if u == s:
+            return []
+        level[u] = -1
+        edge = path.pop()
+        u = heads[reverse[edge]]
+        next_edge[u] += 1
+    return path
+
+
+def push_relabel(graph, residual, s, t, stats=None, deadline=None):
+    """Highest-label push-relabel with the gap heuristic.
+
+    Float weights leave excesses and residuals of rounding size where
+    exact arithmetic would leave none, so both are compared against
+    ``get_tolerance``: an edge within it of its excess is saturated, and
+    an excess within it is dropped.
+    """
+    n = graph.order
+    offsets = graph.offsets
+    heads = graph.heads
+    reverse = graph.reverse
+    tolerance = get_tolerance(graph)
+
+    height = [0] * n
+    excess = [0] * n
+    current = list(offsets[:n])
+    count = [0] * (2 * n + 2)
+    active = [[] for _ in range(2 * n + 2)]
+
+    height[s] = n
+    count[0] = n - 1
+    count[n] = 1
+
+    def push(u, edge, amount):
+        v = heads[edge]
+        residual[edge] -= amount
+        residual[reverse[edge]] += amount
+        excess[u] -= amount
+        if excess[v] <= tolerance and v != s and v != t:
+            active[height[v]] += [v]
+        excess[v] += amount
+
+    for edge in range(offsets[s], offsets[s + 1]):
+        if residual[edge] > 0:
+            excess[s] += residual[edge]
+            push(s, edge, residual[edge])
+
+    highest = 0
+    while highest >= 0:
+        if not active[highest]:
+            highest -= 1
+            continue
+
+        # the flow that reached the sink is a lower bound even while the
+        # preflow is still being discharged
+        check_deadline(deadline, excess[t])
+        u = active[highest].pop()
+        if height[u] != highest or excess[u] <= tolerance:
+            continue
+
+        end = offsets[u + 1]
+        while excess[u] > tolerance:
+            edge = current[u]
+            if edge < end:
+                if (residual[edge] > tolerance and
+                        height[u] == height[heads[edge]] + 1):
+                    amount = residual[edge]
+                    if amount > excess[u] + tolerance:
+                        amount = excess[u]
+                    push(u, edge, amount)
+                else:
+                    current[u] += 1
+                continue
+
+            if not relabel(graph, residual, u, height, count, excess,
+                           active, tolerance):
+                break
+            current[u] = offsets[u]
+            active[height[u]] += [u]
+            highest = max(highest, height[u])
+            break
+
+        if excess[u] <= tolerance:
+            excess[u] = 0
+
+    return excess[t]
+
+
+def relabel(graph, residual, u, height, count, excess, active, tolerance):
+    # returns False, dropping the excess of u, when no edge is left to
+    # push it along, which only rounding can bring about
+    n = graph.order
+    offsets = graph.offsets
+    heads = graph.heads
+
+    new_height = 1 + min((height[heads[edge]]
+                          for edge in range(offsets[u], offsets[u + 1])
+                          if residual[edge] > tolerance), default=2 * n)
+    if new_height > 2 * n:
+        excess[u] = 0
+        return False
+
+    old_height = height[u]
+    count[old_height] -= 1
+    if count[old_height] == 0 and old_height < n:
+        # gap heuristic: nothing above the empty level can reach the sink
+        for v in range(n):
+            if old_height < height[v] < n:
+                count[height[v]] -= 1
+                height[v] = n + 1
+                count[n + 1] += 1
+                if excess[v] > tolerance:
+                    active[n + 1] += [v]
+        new_height = max(new_height, n + 1)
+
+    height[u] = new_height
+    count[new_height] += 1
+    return True
+
+
+def get_tolerance(graph):
+    # the rounding error of sums of capacities, all below the infinity
+    return graph.infinity * TOLERANCE
+
+
+ALGORITHMS = {
+    'edmonds-karp': edmonds_karp,
+    'dinic': dinic,
+    'push-relabel': push_relabel,
+    'scipy': scipy_max_flow,
+}
+
+
+def get_algorithm(algorithm):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Unknown max-flow algorithm: {algorithm}. '
+                         f'Choose one of: {", ".join(ALGORITHMS)}')
+    return ALGORITHMS[algorithm]
@@ -0,0 +1,130 @@
+from .solver import Solver
+
+
+class UnsuccessfulProbe(Exception):
+    """Raised when a solve inside the sweep finds no cut.
+
+    ``result`` is the result of that solve. Whether there is a cut does
+    not depend on the weights, so the whole interval is unsuccessful.
+    """
+
+    def __init__(self, parameter, result):
+        super().__init__(f'No cut at {parameter}')
+        self.result = result
+
+
+def solve_parametric(kb, weights, slopes, lower, upper,
+                     algorithm='edmonds-karp', tolerance=1e-9):
+    """Finds every breakpoint of the minimum cut for ``λ`` in [lower, upper].
+
+    The weight of the PBox axiom ``i`` is ``weights[i] + λ * slopes[i]``.
+    Returns one dict per interval of ``λ`` over which the same axioms are
+    excluded, with the keys of ``solve`` plus ``lower`` and ``upper``.
+    When a path of certain arrows joins ``init`` to ``bot`` there is no
+    cut at any ``λ``, and the one interval returned is unsuccessful.
+
+    Inside a range where no weight changes sign, the minimum cut value is
+    the lower envelope of one line per cut, so the breakpoints are found
+    by intersecting the lines of the cuts at both ends of an interval and
+    solving at the intersection (Eisner-Severance). Every solve reuses the
+    flow of the previous one through a warm-started ``Solver``.
+    """
+    if len(slopes) != len(weights):
+        raise ValueError(f'Expected {len(weights)} slopes, got {len(slopes)}')
+    if lower > upper:
+        raise ValueError(f'Empty interval: [{lower}, {upper}]')
+
+    def weights_at(parameter):
+        return [weight + parameter * slope
+                for weight, slope in zip(weights, slopes)]
+
+    solver = Solver(kb, weights_at(lower), algorithm)
+    varying_pbox_ids = [i for i, slope in enumerate(slopes) if slope != 0]
+
+    def solve_at(parameter):
+        parameter_weights = weights_at(parameter)
+        return solver.update_weights({
+            i: parameter_weights[i] for i in varying_pbox_ids})
+
+    result = solver.result()
+    if not result['success']:
+        return [{'lower': lower, 'upper': upper, **result}]
+
+    intervals = []
+    sign_changes = get_sign_changes(weights, slopes, lower, upper)
+    for start, end in zip([lower] + sign_changes, sign_changes + [upper]):
+        middle_weights = weights_at((start + end) / 2)
+        negative = {i for i, weight in enumerate(middle_weights)
+                    if weight < 0}
+
+        def get_excluded(parameter):
+            # at the ends of the range the weights changing sign are zero,
+            # so they are counted as they are inside it
+            result = solve_at(parameter)
+            if not result['success']:
+                raise UnsuccessfulProbe(parameter, result)
+            return sorted(set(result['prob_axiom_indexes']) | negative)
+
+        def get_line(excluded):
+            pbox_ids = [i for i in excluded if i not in negative]
+            return (sum(weights[i] for i in pbox_ids),
+                    sum(slopes[i] for i in pbox_ids))
+
+        try:
+            intervals += sweep_interval(start, end, get_excluded, get_line,
+                                        tolerance)
+        except UnsuccessfulProbe as probe:
+            return [{'lower': lower, 'upper': upper, **probe.result}]
+
+    return merge_intervals(intervals)
+
+
+def get_sign_changes(weights, slopes, lower, upper):
+    return sorted({-weight / slope
+                   for weight, slope in zip(weights, slopes)
+                   if slope != 0 and lower < -weight / slope < upper})
+
+
+def sweep_interval(start, end, get_excluded, get_line, tolerance):
+    intervals = []
+    pending = [(start, end, get_excluded(start), get_excluded(end))]
+    while len(pending) > 0:
+        start, end, start_excluded, end_excluded = pending.pop()
+        start_line = get_line(start_excluded)
+        end_line = get_line(end_excluded)
+        if start_excluded == end_excluded or start_line[1] == end_line[1]:
+            intervals += [(start, end, start_excluded)]
+            continue
+
+        parameter = (end_line[0] - start_line[0]) / \
+            (start_line[1] - end_line[1])
+        parameter = min(max(parameter, start), end)
+        value = start_line[0] + parameter * start_line[1]
+
+        middle_excluded = get_excluded(parameter)
+        middle_line = get_line(middle_excluded)
+        middle_value = middle_line[0] + parameter * middle_line[1]
+        if value - middle_value <= tolerance * (1 + abs(value)):
+            intervals += [(start, parameter, start_excluded),
+                          (parameter, end, end_excluded)]
+            continue
+
+        pending += [(parameter, end, middle_excluded, end_excluded),
+                    (start, parameter, start_excluded, middle_excluded)]
+
+    return intervals
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end, excluded in intervals:
+        if len(merged) > 0 and merged[-1]['prob_axiom_indexes'] == excluded:
+            merged[-1]['upper'] = end
+            continue
+        if start == end and len(merged) > 0:
+            continue
+        merged += [{'lower': start,
+                    'upper': end,
+                    'success': True,
+                    'prob_axiom_indexes': excluded}]
+    return merged
@@ -0,0 +1,136 @@
+from array import array
+from collections import namedtuple
+from .gel_max_sat import WeightedGraph
+from .gel.reachability import get_strong_components
+
+ReductionStats = namedtuple('ReductionStats', [
+    'order',
+    'size',
+    'reduced_order',
+    'reduced_size',
+    'pruned_vertices',
+    'contracted_vertices',
+    'merged_arrows'])
+
+
+class ReducedGraph(WeightedGraph):
+    """WeightedGraph whose arrows stand for groups of original arrows.
+
+    ``merged_pbox_ids[arrow]`` holds the PBox ids of every original arrow
+    merged into ``arrow``, so a cut maps back to the original axioms.
+    """
+
+    def get_pbox_ids(self, arrow):
+        return self.merged_pbox_ids[arrow]
+
+
+def reduce_graph(weighted_graph):
+    """Shrinks ``weighted_graph`` without changing its minimum cuts.
+
+    Vertices that are not on a path from ``init`` to ``bot`` are removed,
+    strongly connected components of certain arrows are contracted, since
+    no finite cut separates them, and the parallel arrows that result are
+    merged by adding their capacities.
+    """
+    graph = weighted_graph
+    negative_arrows = set(graph.negative_arrows)
+    arrows = [arrow for arrow, pbox_id in enumerate(graph.pbox_ids)
+              if pbox_id not in negative_arrows]
+    arrow_heads = [graph.heads[edge] for edge in graph.arrow_edges]
+
+    successors = [[] for _ in range(graph.order)]
+    predecessors = [[] for _ in range(graph.order)]
+    for arrow in arrows:
+        u, v = graph.arrow_tails[arrow], arrow_heads[arrow]
+        successors[u] += [v]
+        predecessors[v] += [u]
+
+    reached = get_reached(successors, graph.init)
+    co_reached = get_reached(predecessors, graph.bottom)
+    is_kept = [a and b for a, b in zip(reached, co_reached)]
+    kept_vertices = [v for v in range(graph.order) if is_kept[v]]
+
+    certain_successors = [[] for _ in range(graph.order)]
+    for arrow in arrows:
+        u, v = graph.arrow_tails[arrow], arrow_heads[arrow]
+        if graph.pbox_ids[arrow] < 0 and is_kept[u] and is_kept[v]:
+            certain_successors[u] += [v]
+
+    component, components_count = get_strong_components(
+        certain_successors, kept_vertices, graph.order)
+    contracted_vertices = len(kept_vertices) - components_count
+    # init and bot stay even off every path between them
+    pruned_vertices = graph.order - len(
+        set(kept_vertices) | {graph.init, graph.bottom})
+    for v in (graph.init, graph.bottom):
+        if component[v] < 0:
+            component[v] = components_count
+            components_count += 1
+
+    init = component[graph.init]
+    bottom = component[graph.bottom]
+    tails, heads, capacities, merged_pbox_ids = [], [], [], []
+    merged_arrows = 0
+    if init == bottom:
+        # a cycle of certain arrows goes through init and bot, so the
+        # only cut left is an infinite one
+        components_count, init, bottom = 2, 0, 1
+        arrows = []
+        tails, heads = [init], [bottom]
+        capacities, merged_pbox_ids = [graph.infinity], [(-1,)]
+
+    reduced_arrows = {}
+    for arrow in arrows:
+        u, v = graph.arrow_tails[arrow], arrow_heads[arrow]
+        if not (is_kept[u] and is_kept[v]) or component[u] == component[v]:
+            continue
+
+        key = (component[u], component[v])
+        capacity = graph.capacities[graph.arrow_edges[arrow]]
+        pbox_ids = graph.get_pbox_ids(arrow)
+        if key in reduced_arrows:
+            reduced_arrow = reduced_arrows[key]
+            capacities[reduced_arrow] += capacity
+            merged_pbox_ids[reduced_arrow] += pbox_ids
+            merged_arrows += 1
+            continue
+
+        reduced_arrows[key] = len(tails)
+        tails += [key[0]]
+        heads += [key[1]]
+        capacities += [capacity]
+        merged_pbox_ids += [pbox_ids]
+
+    reduced_graph = ReducedGraph.from_arrows(
+        components_count, init, bottom, tails, heads, [-1] * len(tails))
+    reduced_graph.merged_pbox_ids = merged_pbox_ids
+    reduced_graph.weights = graph.weights
+    reduced_graph.infinity = graph.infinity
+    reduced_graph.negative_arrows = list(graph.negative_arrows)
+    reduced_graph.capacities = array('d', bytes(16 * len(tails)))
+    for edge, capacity in zip(reduced_graph.arrow_edges, capacities):
+        reduced_graph.capacities[edge] = capacity
+
+    reduced_graph.reduction = ReductionStats(
+        order=graph.order,
+        size=graph.size,
+        reduced_order=reduced_graph.order,
+        reduced_size=reduced_graph.size,
+        pruned_vertices=pruned_vertices,
+        contracted_vertices=contracted_vertices,
+        merged_arrows=merged_arrows)
+    return reduced_graph
+
+
+def get_reached(successors, s):
+    reached = [False] * len(successors)
+    reached[s] = True
+    stack = [s]
+    while len(stack) > 0:
+        u = stack.pop()
+        for v in successors[u]:
+            if not reached[v]:
+                reached[v] = True
+                stack += [v]
+    return reached
+
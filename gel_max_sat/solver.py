@@ -0,0 +1,305 @@
+from collections import defaultdict
+from .gel_max_sat import (
+    WeightedGraph,
+    dfs,
+    get_arrow_premises,
+    get_cut_set,
+    get_infinity,
+    get_result,
+)
+from .max_flow import (
+    get_algorithm,
+    get_augment_path,
+    get_augment_flow,
+    update_path_weights,
+)
+
+
+# free edges each vertex keeps for the arrows added by ``update``
+SPARE_SLOTS = 4
+
+
+class Solver:
+    """Solver handle that keeps the maximum flow between solves.
+
+    After ``update_weights`` only the capacities of the changed PBox
+    axioms are touched: flow above a lowered capacity is routed around
+    the arrow or sent back to ``init`` and ``bot``, and raised capacities
+    are filled by augmenting from the previous flow.
+
+    Once ``attach``-ed, the solver listens to the edits of ``kb`` and
+    ``update`` applies them to the graph in place. A removed arrow loses
+    its capacity, as a lowered weight would, and frees its edges; an
+    added arrow takes free edges of its ends and a new concept becomes a
+    new vertex. Only when a vertex has run out of free edges is the graph
+    rebuilt, carrying over the flow of every arrow that is still there.
+    """
+
+    def __init__(self, kb, weights, algorithm='edmonds-karp'):
+        self.kb = kb
+        self.weights = [] if weights is None else list(weights)
+        self.max_flow = get_algorithm(algorithm)
+        self.flow = 0
+        self.changes = {}
+        self.new_concepts = []
+
+        self.build()
+        self.residual = self.weighted_graph.residual()
+        self.augment()
+
+    def build(self):
+        self.kb.saturate()
+        concepts = self.kb.concepts
+        self.weighted_graph = WeightedGraph(self.kb, self.weights,
+                                            SPARE_SLOTS)
+        # the same order as the vertices and the arrows of the graph
+        self.vertices = {concept.id: vertex
+                         for vertex, concept in enumerate(concepts)}
+        # an arrow is a graph arrow per derivation
+        self.arrow_indexes = {}
+        keys = (get_arrow_key(concept, arrow) for concept in concepts
+                for arrow in concept.sup_arrows
+                for _ in arrow.premise_sets)
+        for index, key in enumerate(keys):
+            self.arrow_indexes.setdefault(key, []).append(index)
+
+        self.pbox_arrows = defaultdict(list)
+        for arrow in range(self.weighted_graph.size):
+            for pbox_id in self.weighted_graph.get_premises(arrow):
+                self.pbox_arrows[pbox_id] += [arrow]
+
+    def augment(self):
+        graph = self.weighted_graph
+        self.flow += self.max_flow(graph, self.residual,
+                                   graph.init, graph.bottom)
+
+    def result(self):
+        graph = self.weighted_graph
+        visited = dfs(graph, self.residual, graph.init)
+        return get_result(get_cut_set(graph, visited))
+
+    def update_weights(self, weights):
+        graph = self.weighted_graph
+        changed_pbox_ids = set()
+        has_changed_sign = False
+        for pbox_id, weight in weights.items():
+            if pbox_id < 0:
+                raise ValueError(f'Invalid PBox ID: {pbox_id}. '
+                                 'Certain axioms have no weight.')
+            old_weight = graph.get_weight(pbox_id, self.weights)
+            if old_weight != weight:
+                self.weights[pbox_id] = weight
+                changed_pbox_ids.add(pbox_id)
+                has_changed_sign |= (old_weight < 0) != (weight < 0)
+
+        if has_changed_sign:
+            graph.negative_arrows = graph.get_negative_arrows(self.weights)
+        self.set_weight_capacities(changed_pbox_ids)
+        self.augment()
+        return self.result()
+
+    def set_weight_capacities(self, changed_pbox_ids):
+        graph = self.weighted_graph
+        infinity = get_infinity(self.weights)
+        if infinity != graph.infinity:
+            graph.infinity = infinity
+            changed_pbox_ids.add(-1)
+
+        for pbox_id in changed_pbox_ids:
+            for arrow in self.pbox_arrows.get(pbox_id, ()):
+                capacity = max(0, graph.get_arrow_weight(arrow, self.weights))
+                self.set_capacity(arrow, capacity)
+
+    def attach(self):
+        self.kb.listeners += [self]
+
+    def detach(self):
+        self.kb.listeners.remove(self)
+
+    def arrow_added(self, sub_concept, arrow):
+        self.changes[get_arrow_key(sub_concept, arrow)] = arrow
+
+    def arrow_removed(self, sub_concept, arrow):
+        self.changes[get_arrow_key(sub_concept, arrow)] = None
+
+    def concept_added(self, concept):
+        if concept.id not in self.vertices:
+            self.new_concepts += [concept]
+
+    def rules_changed(self):
+        # the arrows they derive are seen on the next saturation
+        pass
+
+    def update(self, weights=None):
+        """Re-solves after the edits of the knowledge base seen since the
+        last call, and with ``weights`` when given."""
+        self.kb.saturate()
+        graph = self.weighted_graph
+        changes, self.changes = self.changes, {}
+        new_concepts, self.new_concepts = self.new_concepts, []
+
+        changed_pbox_ids = set()
+        if weights is not None:
+            weights = list(weights)
+            changed_pbox_ids = {
+                pbox_id for pbox_id in range(len(weights))
+                if pbox_id >= len(self.weights) or
+                weights[pbox_id] != self.weights[pbox_id]}
+            self.weights = graph.weights = weights
+
+        for concept in new_concepts:
+            if concept.id not in self.vertices:
+                self.vertices[concept.id] = graph.add_vertex(SPARE_SLOTS)
+                self.residual.extend([0] * SPARE_SLOTS)
+
+        self.set_weight_capacities(changed_pbox_ids)
+        is_applied = self.apply_changes(changes)
+        graph.negative_arrows = graph.get_negative_arrows(self.weights)
+        if not is_applied:
+            self.rebuild()
+        self.augment()
+        return self.result()
+
+    def apply_changes(self, changes):
+        # returns False once an added arrow finds no free edge, leaving
+        # the changes after it to a rebuild
+        graph = self.weighted_graph
+        for key, arrow in changes.items():
+            premises = [] if arrow is None else get_arrow_premises(arrow)
+            for index in list(self.arrow_indexes.get(key, ())):
+                if graph.get_premises(index) not in premises:
+                    self.delete_arrow(key, index)
+
+            old_premises = [graph.get_premises(index)
+                            for index in self.arrow_indexes.get(key, ())]
+            for pbox_ids in premises:
+                if pbox_ids not in old_premises and \
+                        not self.insert_arrow(key, pbox_ids):
+                    return False
+        return True
+
+    def insert_arrow(self, key, pbox_ids):
+        graph = self.weighted_graph
+        sub_id, sup_id, _ = key
+        index = graph.insert_arrow(self.vertices[sub_id],
+                                   self.vertices[sup_id], pbox_ids)
+        if index is None:
+            return False
+
+        self.arrow_indexes.setdefault(key, []).append(index)
+        for pbox_id in pbox_ids:
+            self.pbox_arrows[pbox_id] += [index]
+        edge = graph.arrow_edges[index]
+        capacity = max(0, graph.get_arrow_weight(index, self.weights))
+        graph.capacities[edge] = capacity
+        self.residual[edge] = capacity
+        self.residual[graph.reverse[edge]] = 0
+        return True
+
+    def delete_arrow(self, key, index):
+        graph = self.weighted_graph
+        indexes = self.arrow_indexes[key]
+        indexes.remove(index)
+        if len(indexes) == 0:
+            del self.arrow_indexes[key]
+        self.set_capacity(index, 0)
+        for pbox_id in graph.get_premises(index):
+            self.pbox_arrows[pbox_id].remove(index)
+
+        edge = graph.arrow_edges[index]
+        self.residual[edge] = 0
+        self.residual[graph.reverse[edge]] = 0
+        graph.delete_arrow(index)
+
+    def rebuild(self):
+        # flow is kept per arrow key and premises; the flow of a removed
+        # arrow, or above a lowered capacity, is repaired as in
+        # update_weights
+        old_graph = self.weighted_graph
+        flows = {}
+        for key, arrows in self.arrow_indexes.items():
+            for arrow in arrows:
+                edge = old_graph.arrow_edges[arrow]
+                flow = self.residual[old_graph.reverse[edge]]
+                if flow > 0:
+                    flows[(key, old_graph.get_premises(arrow))] = flow
+
+        self.build()
+        graph = self.weighted_graph
+        self.residual = graph.residual()
+        arrow_indexes = {(key, graph.get_premises(arrow)): arrow
+                         for key, arrows in self.arrow_indexes.items()
+                         for arrow in arrows}
+
+        # every kept flow is put back before any is capped, so each cap
+        # is repaired against the whole flow
+        kept_arrows = []
+        removed_flows = []
+        for (key, premises), flow in flows.items():
+            arrow = arrow_indexes.get((key, premises))
+            if arrow is None:
+                removed_flows += [(self.vertices[key[0]],
+                                   self.vertices[key[1]], flow)]
+                continue
+            edge = graph.arrow_edges[arrow]
+            self.residual[edge] = max(0, self.residual[edge] - flow)
+            self.residual[graph.reverse[edge]] = flow
+            kept_arrows += [arrow]
+        for arrow in kept_arrows:
+            self.set_capacity(arrow,
+                              graph.capacities[graph.arrow_edges[arrow]])
+        for u, v, flow in removed_flows:
+            self.repair(u, v, flow)
+
+    def set_capacity(self, arrow, capacity):
+        # the flow above a lowered capacity is repaired at once, so the
+        # next arrow is capped against the flow as it is then
+        graph = self.weighted_graph
+        edge = graph.arrow_edges[arrow]
+        reverse_edge = graph.reverse[edge]
+        flow = self.residual[reverse_edge]
+
+        graph.capacities[edge] = capacity
+        if capacity >= flow:
+            self.residual[edge] = capacity - flow
+            return
+
+        self.residual[edge] = 0
+        self.residual[reverse_edge] = capacity
+        self.repair(graph.arrow_tails[arrow], graph.heads[edge],
+                    flow - capacity)
+
+    def repair(self, u, v, overflow):
+        # u is left with `overflow` more inflow than outflow and v with the
+        # same shortage; reroute it from u to v when the residual graph
+        # allows, otherwise cancel it back to the source and from the sink
+        graph = self.weighted_graph
+        s, t = graph.init, graph.bottom
+
+        overflow -= self.push(u, v, overflow)
+        if overflow <= 0:
+            return
+
+        if u != s:
+            self.push(u, s, overflow)
+        if v != t:
+            self.push(t, v, overflow)
+        self.flow -= overflow
+
+    def push(self, a, b, amount):
+        graph = self.weighted_graph
+        pushed = 0
+        while pushed < amount:
+            is_there_path, path = get_augment_path(graph, self.residual, a, b)
+            if not is_there_path:
+                break
+            augment_flow = min(amount - pushed,
+                               get_augment_flow(graph, self.residual, path))
+            update_path_weights(graph, self.residual, path, augment_flow)
+            pushed += augment_flow
+        return pushed
+
+
+def get_arrow_key(sub_concept, arrow):
+    # concept ids, which ``Solver.vertices`` maps to the graph vertices
+    return sub_concept.id, arrow.concept.id, arrow.role.id
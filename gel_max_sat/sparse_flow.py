@@ -0,0 +1,158 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, maximum_flow
+
+# scipy.sparse.csgraph.maximum_flow keeps capacities and flows in int32
+CAPACITY_LIMIT = 2**31 - 1
+
+
+def scipy_max_flow(weighted_graph, residual, s, t, stats=None,
+                   deadline=None):
+    """Augments ``residual`` with ``scipy.sparse.csgraph.maximum_flow``.
+
+    Every edge of ``residual`` becomes an entry of a sparse capacity
+    matrix, scaled to integers by ``get_scale``, and the flow scipy finds
+    between each pair of vertices is split back over their parallel
+    edges. An edge left with no unit of scaled capacity is saturated, so
+    the residual graph reaches the same vertices as scipy's. The engine
+    keeps no search counters and cannot stop at a deadline.
+
+    The certain arrows get a scaled infinity above every finite cut, and
+    a pair of vertices with one keeps just that capacity. That bound only
+    holds when no path of certain arrows joins ``s`` to ``t``, so such
+    paths are first saturated directly, on the unscaled residual.
+    """
+    if deadline is not None:
+        raise ValueError('The scipy engine cannot stop at a time budget')
+
+    graph = weighted_graph
+    n = graph.order
+    offsets = np.frombuffer(graph.offsets, dtype=np.int32)
+    heads = np.frombuffer(graph.heads, dtype=np.int32)
+    reverse = np.frombuffer(graph.reverse, dtype=np.int32)
+    tails = np.repeat(np.arange(n, dtype=np.int32), np.diff(offsets))
+    if len(tails) == 0:
+        return 0
+    capacities = np.frombuffer(residual)
+
+    # only the forward edges of certain arrows hold the infinite weight
+    is_infinite = np.frombuffer(graph.capacities) >= graph.infinity
+    certain_flow = saturate_certain_paths(graph, capacities, is_infinite,
+                                          tails, heads, s, t)
+    is_infinite &= capacities > 0
+    scale = get_scale(weighted_graph, residual)
+    scaled_capacities = np.rint(capacities * scale).astype(np.int64)
+    infinity = scaled_capacities[~is_infinite].sum() + 1
+    scaled_capacities[is_infinite] = infinity
+
+    # parallel edges are summed by the conversion to CSR; anything at or
+    # above the scaled infinity is still uncuttable, so clip it there
+    capacity_graph = csr_matrix((scaled_capacities, (tails, heads)),
+                                shape=(n, n))
+    capacity_graph.data = np.minimum(capacity_graph.data, infinity)
+    capacity_graph.eliminate_zeros()
+    result = maximum_flow(capacity_graph.astype(np.int32), s, t)
+    if result.flow_value >= infinity:
+        raise ValueError('A path of certain arrows was left unsaturated')
+
+    pair_flows = np.asarray(get_flow(result)[tails, heads],
+                            dtype=np.int64).ravel()
+    flows = split_pair_flows(tails, heads, scaled_capacities, pair_flows)
+
+    capacities += (flows[reverse] - flows) / scale
+    left = scaled_capacities - flows + flows[reverse]
+    capacities[left == 0] = 0
+    return certain_flow + result.flow_value / scale
+
+
+def saturate_certain_paths(graph, capacities, is_infinite, tails, heads,
+                           s, t):
+    """Augments ``capacities`` along paths of certain edges from ``s`` to
+    ``t`` until there is none left, and returns the flow sent.
+
+    Each augmentation saturates an edge of the path, so every remaining
+    path from ``s`` to ``t`` has a finite edge, as the scaled infinity
+    requires.
+    """
+    n = graph.order
+    reverse = graph.reverse
+    flow = 0
+    while True:
+        edges = np.flatnonzero(is_infinite & (capacities > 0))
+        certain_graph = csr_matrix(
+            (np.ones(len(edges)), (tails[edges], heads[edges])),
+            shape=(n, n))
+        _, predecessors = breadth_first_order(certain_graph, s,
+                                              return_predecessors=True)
+        if predecessors[t] < 0:
+            return flow
+
+        path = []
+        v = t
+        while v != s:
+            u = predecessors[v]
+            path += [next(edge for edge in range(graph.offsets[u],
+                                                 graph.offsets[u + 1])
+                          if heads[edge] == v and is_infinite[edge] and
+                          capacities[edge] > 0)]
+            v = u
+        augment_flow = min(capacities[edge] for edge in path)
+        for edge in path:
+            capacities[edge] -= augment_flow
+            capacities[reverse[edge]] += augment_flow
+        flow += augment_flow
+
+
+def get_flow(result):
+    # scipy 1.8 renamed ``residual``, which always held the flow, to ``flow``
+    flow = getattr(result, 'flow', None)
+    return result.residual if flow is None else flow
+
+
+def split_pair_flows(tails, heads, capacities, pair_flows):
+    """Fills the edges of each pair of vertices in order with the net
+    flow scipy sent between them, and returns the flow of every edge."""
+    order = np.lexsort((heads, tails))
+    sorted_capacities = capacities[order]
+    sorted_tails = tails[order]
+    sorted_heads = heads[order]
+
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = (sorted_tails[1:] != sorted_tails[:-1]) | \
+        (sorted_heads[1:] != sorted_heads[:-1])
+    first = np.maximum.accumulate(
+        np.where(is_first, np.arange(len(order)), 0))
+    before = np.cumsum(sorted_capacities) - sorted_capacities
+    before -= before[first]
+
+    flows = np.empty(len(order), dtype=np.int64)
+    flows[order] = np.clip(pair_flows[order] - before, 0, sorted_capacities)
+    return flows
+
+
+def get_scale(weighted_graph, residual=None):
+    """Returns the fixed-point scale used for the capacities.
+
+    The scale is the largest power of two ``2**k`` for which the scaled
+    finite capacities, plus one unit of rounding for each edge, still fit
+    in int32. Every capacity is rounded to the nearest multiple of
+    ``1 / scale``. A cut then moves by at most ``size / scale``, so the
+    cut returned is optimal within ``2 * size / scale`` of the excluded
+    weight. Integer weights stay exact whenever they fit.
+    """
+    graph = weighted_graph
+    residual = graph.capacities if residual is None else residual
+    capacities = np.frombuffer(residual)
+    is_infinite = np.frombuffer(graph.capacities) >= graph.infinity
+    finite_weight = capacities[~is_infinite].sum()
+
+    room = CAPACITY_LIMIT - 1 - len(capacities)
+    if room <= 0:
+        raise ValueError('The graph has too many arrows for int32 flows')
+    if finite_weight == 0:
+        return 1
+
+    exponent = int(np.floor(np.log2(room / finite_weight)))
+    while 2.0**exponent * finite_weight > room:
+        exponent -= 1
+    return 2.0**exponent
@@ -0,0 +1,43 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+class SolveStats:
+    """Timings and counters gathered by ``solve(..., stats=True)``.
+
+    ``timings`` maps each phase of the solve to the seconds spent in it.
+    The search counters are kept by the augmenting path engines
+    (Edmonds-Karp and Dinic) and by the final ``dfs``; push-relabel and
+    scipy only report timings and the flow.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.augmenting_paths = 0
+        self.vertex_visits = 0
+        self.edge_visits = 0
+        self.flow = 0
+        self.order = 0
+        self.size = 0
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}'
+                           for name, value in vars(self).items())
+        return f'SolveStats({fields})'
+
+    @contextmanager
+    def time(self, phase):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = \
+                self.timings.get(phase, 0) + perf_counter() - start
+
+    def count_search(self, vertex_visits, edge_visits):
+        self.vertex_visits += vertex_visits
+        self.edge_visits += edge_visits
+
+
+def timed(stats, phase):
+    return nullcontext() if stats is None else stats.time(phase)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import pytest
+from gel_max_sat import gel
+from gel_max_sat.gel.owl import ParseCache, cache
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                            'data', 'example.owl')
+
+
+@pytest.fixture
+def example_file(tmp_path):
+    path = tmp_path / 'example.owl'
+    shutil.copy(EXAMPLE_FILE, path)
+    return str(path)
+
+
+@pytest.mark.timeout(10)
+def test_parse_cache_hit_matches_parse(example_file, tmp_path):
+    parse_cache = ParseCache(tmp_path / 'cache')
+    onto, kb = parse_cache.parse(example_file)
+    assert onto is not None
+
+    onto, cached_kb = parse_cache.parse(example_file)
+    assert onto is None
+    assert (parse_cache.hits, parse_cache.misses) == (1, 1)
+    assert cached_kb.fingerprint == kb.fingerprint
+
+
+@pytest.mark.timeout(1)
+def test_parse_cache_key_follows_content_and_imports(tmp_path):
+    imported_file = tmp_path / 'imported.owl'
+    imported_file.write_text('<a> <b> <c> .\n')
+    file = tmp_path / 'onto.owl'
+    file.write_text('<o> <http://www.w3.org/2002/07/owl#imports> '
+                    '<imported.owl> .\n')
+
+    key = cache.get_key(str(file))
+    imported_file.write_text('<a> <b> <d> .\n')
+    assert cache.get_key(str(file)) != key
+
+
+@pytest.mark.timeout(1)
+def test_parse_cache_key_follows_reader_version(tmp_path, monkeypatch):
+    triples_file = tmp_path / 'onto.nt'
+    owl_file = tmp_path / 'onto.owl'
+    for file in (triples_file, owl_file):
+        file.write_text('<a> <b> <c> .\n')
+    triples_key = cache.get_key(str(triples_file))
+    owl_key = cache.get_key(str(owl_file))
+
+    monkeypatch.setattr(cache.triples, 'VERSION', cache.triples.VERSION + 1)
+    assert cache.get_key(str(triples_file)) != triples_key
+    assert cache.get_key(str(owl_file)) == owl_key
+
+
+@pytest.mark.timeout(10)
+def test_parse_cache_evicts_least_recently_used(example_file, tmp_path):
+    parse_cache = ParseCache(tmp_path / 'cache')
+    parse_cache.parse(example_file)
+    size = sum(entry.stat().st_size
+               for entry in os.scandir(parse_cache.directory))
+
+    other_file = tmp_path / 'other.owl'
+    with open(example_file) as f:
+        other_file.write_text(f.read() + '\n')
+    parse_cache.max_bytes = size
+    parse_cache.parse(str(other_file))
+
+    _, kb = parse_cache.parse(str(other_file))
+    assert parse_cache.hits == 1
+    assert len(os.listdir(parse_cache.directory)) == 1
+    assert isinstance(kb, gel.KnowledgeBase)
+
+
+@pytest.mark.timeout(10)
+def test_parse_cache_replaces_corrupt_entries(example_file, tmp_path):
+    parse_cache = ParseCache(tmp_path / 'cache')
+    _, kb = parse_cache.parse(example_file)
+    path = os.path.join(parse_cache.directory,
+                        cache.get_key(example_file) + cache.SUFFIX)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    # the first section, concept_kinds, starts at the offset after the
+    # magic, the version and the role count; concept 3 is the first one
+    # that is not init, bot or top
+    kind_offset = int.from_bytes(data[24:32], 'little') + 3
+    bad_kind = data[:kind_offset] + b'\x7f' + data[kind_offset + 1:]
+    for corrupt_data in (data[:len(data) // 2], bad_kind, b''):
+        with open(path, 'wb') as f:
+            f.write(corrupt_data)
+        misses = parse_cache.misses
+        onto, cached_kb = parse_cache.parse(example_file)
+        assert onto is not None
+        assert parse_cache.misses == misses + 1
+        assert cached_kb.fingerprint == kb.fingerprint
+
+    onto, _ = parse_cache.parse(example_file)
+    assert onto is None
@@ -0,0 +1,128 @@
+import os
+import pytest
+from gel_max_sat import gel
+from gel_max_sat.gel.owl import triples
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                            'data', 'example.owl')
+
+TURTLE = '''
+@prefix : <urn:test#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+:r a owl:ObjectProperty .
+:s a owl:ObjectProperty ; rdfs:subPropertyOf :r .
+:t a owl:ObjectProperty ;
+    owl:propertyChainAxiom ( :r :s ) .
+:C a owl:Class .
+:D a owl:Class ;
+    rdfs:subClassOf :C ,
+        [ a owl:Restriction ; owl:onProperty :r ; owl:someValuesFrom :C ] .
+:E a owl:Class ;
+    owl:equivalentClass [ a owl:Restriction ;
+                          owl:onProperty :s ; owl:someValuesFrom :D ] .
+:a a owl:NamedIndividual , :D .  #!pbox-id 1
+:b a owl:NamedIndividual .
+:a :r :b .
+[ a owl:Axiom ;
+  owl:annotatedSource :D ;
+  owl:annotatedProperty rdfs:subClassOf ;
+  owl:annotatedTarget :C ;
+  rdfs:comment """#!pbox-id
+0""" ] .
+'''
+
+
+def get_arrows(kb):
+    return {(concept.iri, type(concept).__name__, arrow.role.iri,
+             arrow.concept.iri, arrow.pbox_id, arrow.is_derived)
+            for concept in kb.concepts for arrow in concept.sup_arrows}
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('chunk_size', [1, 10000])
+def test_triples_parse_turtle(tmp_path, chunk_size):
+    path = tmp_path / 'onto.ttl'
+    path.write_text(TURTLE)
+    _, kb = triples.parse(path, chunk_size=chunk_size)
+
+    expected_kb = gel.KnowledgeBase(triples.NOTHING, triples.THING)
+    for iri in ['C', 'D', 'E']:
+        expected_kb.add_concept(gel.Concept('urn:test#' + iri))
+    for iri in ['a', 'b']:
+        expected_kb.add_concept(gel.IndividualConcept('urn:test#' + iri))
+    for iri in ['r', 's', 't']:
+        expected_kb.add_role(gel.Role('urn:test#' + iri))
+    expected_kb.add_concept(gel.ExistentialConcept('urn:test#s',
+                                                   'urn:test#D'))
+    for sub, sup, role, pbox_id in [
+            ('D', 'C', expected_kb.is_a, 0),
+            ('D', 'C', 'urn:test#r', -1),
+            ('E', 'urn:test#s.D', expected_kb.is_a, -1),
+            ('urn:test#s.D', 'E', expected_kb.is_a, -1),
+            ('a', 'D', expected_kb.is_a, 1),
+            ('a', 'b', 'urn:test#r', -1)]:
+        expected_kb.add_axiom(expected_kb.get_concept(
+            sub if sub.startswith('urn') else 'urn:test#' + sub),
+            sup if sup.startswith('urn') else 'urn:test#' + sup,
+            role, pbox_id=pbox_id)
+
+    assert get_arrows(kb) == get_arrows(expected_kb)
+    assert kb.fingerprint == expected_kb.fingerprint
+    assert {key: [role.iri for role in roles]
+            for key, roles in kb.role_inclusions.items()} == {
+        'urn:test#s': ['urn:test#r'],
+        ('urn:test#r', 'urn:test#s'): ['urn:test#t']}
+
+
+@pytest.mark.timeout(10)
+def test_triples_parse_matches_owl_parser(tmp_path):
+    import owlready2 as owl
+    path = str(tmp_path / 'example.nt')
+    owl.get_ontology(EXAMPLE_FILE).load().save(path, format='ntriples')
+
+    kb = gel.KnowledgeBase.from_file(EXAMPLE_FILE)
+    _, triples_kb = triples.parse(path)
+    assert get_arrows(triples_kb) == get_arrows(kb)
+    assert triples_kb.pbox_axioms.keys() == kb.pbox_axioms.keys()
+
+
+@pytest.mark.timeout(1)
+def test_triples_reader_handles_literals_and_comments():
+    lines = ['<urn:s> <urn:p> "a \\"quoted\\" # not a comment"@en .\n',
+             '<urn:s> <urn:q> """two\n',
+             'lines""" . # a comment\n']
+    assert list(triples.TurtleReader(lines).read()) == [
+        triples.Triple('urn:s', 'urn:p',
+                       triples.Literal('a "quoted" # not a comment')),
+        triples.Triple('urn:s', 'urn:q', triples.Literal('two\nlines'))]
+
+
+@pytest.mark.timeout(1)
+def test_triples_reader_rejects_invalid_syntax():
+    with pytest.raises(ValueError):
+        list(triples.TurtleReader(['<urn:s> <urn:p> .\n']).read())
+    with pytest.raises(ValueError):
+        list(triples.TurtleReader(['x:s <urn:p> <urn:o> .\n']).read())
+
+
+@pytest.mark.timeout(10)
+def test_triples_parse_reads_saved_solutions(tmp_path):
+    from gel_max_sat import save_solution
+    kb = gel.KnowledgeBase.from_file(EXAMPLE_FILE)
+    excluded_ids = sorted(kb.pbox_axioms)[:2]
+    path = str(tmp_path / 'solution.nt')
+    save_solution(kb, {'success': True, 'prob_axiom_indexes': excluded_ids},
+                  path)
+    _, solution_kb = triples.parse(path)
+
+    def get_axioms(kb, excluded_ids=()):
+        return {(concept.iri, arrow.role.iri, arrow.concept.iri)
+                for concept in kb.concepts for arrow in concept.sup_arrows
+                if kb.init not in (concept, arrow.concept) and
+                not arrow.is_derived and arrow.pbox_id not in excluded_ids}
+
+    axioms = get_axioms(kb, excluded_ids)
+    assert any(role != kb.is_a.iri for _, role, _ in axioms)
+    assert get_axioms(solution_kb) == axioms
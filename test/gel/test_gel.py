@@ -1,5 +1,8 @@
+import random
 import pytest
+from contextlib import nullcontext
 from gel_max_sat import gel
+from gel_max_sat.gel.concepts import InitialConcept
 
 
 @pytest.fixture
@@ -176,6 +179,83 @@ def test_graph_fix_existential_head_axiom(simple_graph):
     assert existential_concept in concept_d.is_a()
 
 
+@pytest.mark.timeout(1)
+def test_graph_fix_existential_head_axiom_keeps_pbox():
+    graph = gel.KnowledgeBase('bot', 'top')
+    graph.add_concept(gel.Concept('C'))
+    graph.add_concept(gel.Concept('D'))
+    graph.add_role(gel.Role('r'))
+    graph.add_axiom('D', 'C', 'r', pbox_id=0)
+    graph.add_concept(gel.ExistentialConcept('r', 'C'))
+
+    concept_d = graph.get_concept('D')
+    existential_concept = graph.get_concept('r.C')
+    assert graph.pbox_axioms == {0: (concept_d, existential_concept,
+                                     graph.is_a)}
+    assert graph.get_role('r').axioms == [(existential_concept,
+                                           graph.get_concept('C'))]
+
+
+@pytest.mark.timeout(1)
+def test_graph_deferred_fixing_matches_immediate_fixing():
+    def get_graph(is_deferred):
+        graph = gel.KnowledgeBase('bot', 'top')
+        for iri in ['C', 'D', 'E']:
+            graph.add_concept(gel.Concept(iri))
+        graph.add_role(gel.Role('r'))
+        graph.add_role(gel.Role('s'))
+        with graph.deferred_fixing() if is_deferred else nullcontext():
+            graph.add_axiom('D', 'C', 'r')
+            graph.add_axiom('E', 'C', 'r', pbox_id=0)
+            graph.add_concept(gel.ExistentialConcept('r', 'C'))
+            graph.add_axiom('C', 'D', 's')
+            graph.add_concept(gel.ExistentialConcept('s', 'D'))
+        return graph
+
+    def get_arrows(graph):
+        return {(concept.iri, str(arrow.role), arrow.concept.iri,
+                 arrow.pbox_id)
+                for concept in graph.concepts for arrow in concept.sup_arrows}
+
+    graph = get_graph(is_deferred=False)
+    deferred_graph = get_graph(is_deferred=True)
+    assert get_arrows(deferred_graph) == get_arrows(graph)
+    assert deferred_graph.fingerprint == graph.fingerprint
+
+
+@pytest.mark.timeout(1)
+def test_graph_add_axioms_bulk_matches_add_axiom():
+    axioms = [('D', 'C', 'r', -1), ('E', 'C', 'r', 0), ('D', 'E', 's', 1),
+              ('D', 'C', 'r', 2), ('E', 'D', 'is a', -1)]
+
+    def get_graph():
+        graph = gel.KnowledgeBase('bot', 'top')
+        for iri in ['C', 'D', 'E']:
+            graph.add_concept(gel.Concept(iri))
+        graph.add_role(gel.Role('r'))
+        graph.add_role(gel.Role('s'))
+        graph.add_concept(gel.ExistentialConcept('r', 'C'))
+        return graph
+
+    graph = get_graph()
+    added = sum(graph.add_axiom(sub, sup, role, pbox_id=pbox_id)
+                for sub, sup, role, pbox_id in axioms)
+    bulk_graph = get_graph()
+    assert bulk_graph.add_axioms_bulk(axioms) == added == 4
+
+    def get_arrows(graph):
+        return {(concept.iri, str(arrow.role), arrow.concept.iri,
+                 arrow.pbox_id)
+                for concept in graph.concepts for arrow in concept.sup_arrows}
+
+    assert get_arrows(bulk_graph) == get_arrows(graph)
+    assert bulk_graph.fingerprint == graph.fingerprint
+    assert {pbox_id: tuple(map(str, axiom))
+            for pbox_id, axiom in bulk_graph.pbox_axioms.items()} == \
+        {pbox_id: tuple(map(str, axiom))
+         for pbox_id, axiom in graph.pbox_axioms.items()}
+
+
 @pytest.mark.timeout(1)
 def test_graph_add_pbox_axiom():
     graph = gel.KnowledgeBase('bot', 'top')
@@ -200,3 +280,252 @@ def test_graph_can_handle_multiple_completions():
                                      axioms_count=1000,
                                      uncertain_axioms_count=40,
                                      roles_count=10)
+
+
+@pytest.mark.timeout(1)
+def test_graph_fingerprint_tracks_arrows(simple_graph):
+    fingerprint = simple_graph.fingerprint
+    simple_graph.add_axiom('C', 'bot', simple_graph.is_a, pbox_id=0)
+    assert simple_graph.fingerprint != fingerprint
+
+    arrow = gel.Arrow(simple_graph.get_concept('bot'), simple_graph.is_a)
+    simple_graph.remove_arrow(simple_graph.get_concept('C'), arrow)
+    assert simple_graph.fingerprint == fingerprint
+
+
+@pytest.mark.timeout(1)
+def test_graph_interns_dense_ids(simple_graph):
+    concepts = simple_graph.concepts
+    assert [c.id for c in concepts] == list(range(len(concepts)))
+    assert [r.id for r in simple_graph.roles] == \
+        list(range(len(simple_graph.roles)))
+    assert not any(hasattr(c, '__dict__') for c in concepts)
+
+    concept = simple_graph.get_concept('C')
+    arrow = gel.Arrow(concept, simple_graph.is_a, pbox_id=7)
+    assert arrow == gel.Arrow(concept, simple_graph.is_a)
+    assert hash(arrow) == hash(gel.Arrow(concept, simple_graph.is_a))
+    assert simple_graph.get_concept('a').has_arrow(arrow)
+
+
+@pytest.mark.timeout(5)
+def test_graph_random_bulk_draws_distinct_arrows():
+    graph = gel.KnowledgeBase.random_bulk(concepts_count=30,
+                                          axioms_count=200,
+                                          uncertain_axioms_count=50,
+                                          roles_count=2, seed=3)
+    arrows = [(c.iri, a.role.iri, a.concept.iri, a.pbox_id)
+              for c in graph.concepts for a in c.sup_arrows]
+    assert len(arrows) == 201
+    assert len({arrow[:3] for arrow in arrows}) == len(arrows)
+    assert all(arrow[2] != graph.init.iri for arrow in arrows)
+    assert sorted(graph.pbox_axioms) == list(range(50))
+
+    rebuilt = gel.KnowledgeBase('bot', 'top')
+    for i in range(30):
+        rebuilt.add_concept(gel.Concept(i))
+    for role in graph.roles[1:]:
+        rebuilt.add_role(gel.Role(role.iri))
+    for sub_iri, role_iri, sup_iri, pbox_id in arrows:
+        rebuilt.add_axiom(sub_iri, sup_iri, role_iri, pbox_id=pbox_id)
+    assert rebuilt.fingerprint == graph.fingerprint
+
+
+@pytest.mark.timeout(1)
+def test_graph_saturates_role_inclusion(graph_pre_role_inclusion):
+    graph = graph_pre_role_inclusion
+    graph.add_role_inclusion('i', 'j')
+    graph.add_concept(gel.ExistentialConcept('j', 'D'))
+    graph.add_axiom('C', 'D', 'i')
+    existential_concept = graph.get_concept('j.D')
+
+    graph.saturate()
+    assert existential_concept in graph.get_concept('C').is_a()
+
+
+@pytest.mark.timeout(1)
+def test_graph_saturates_chained_role_inclusion(
+        graph_pre_chained_role_inclusion):
+    graph = graph_pre_chained_role_inclusion
+    graph.add_chained_role_inclusion(('i', 'j'), 'k')
+    graph.add_concept(gel.ExistentialConcept('k', 'D'))
+    graph.add_axiom('C', 'D_prime', 'i')
+    existential_concept = graph.get_concept('k.D')
+
+    graph.saturate()
+    assert existential_concept not in graph.get_concept('C').is_a()
+
+    graph.add_axiom('D_prime', 'D', 'j')
+    graph.saturate()
+    assert existential_concept in graph.get_concept('C').is_a()
+
+
+@pytest.mark.timeout(1)
+def test_graph_tracks_empty_concepts(init_bot_graph):
+    graph = init_bot_graph
+    concepts = [graph.get_concept(iri) for iri in ['init', 'bot', 'a', 'C']]
+    assert graph.has_path_init_to_bot
+    assert graph.empty_concepts == set(concepts)
+
+    concept_c = graph.get_concept('C')
+    graph.remove_arrow(concept_c, gel.Arrow(graph.bot, graph.is_a))
+    assert not graph.has_path_init_to_bot
+    assert graph.empty_concepts == {graph.bot}
+
+    graph.add_axiom('C', 'bot', graph.is_a, pbox_id=0)
+    assert not concept_c.is_empty()
+
+
+@pytest.mark.timeout(1)
+def test_concept_is_empty_without_graph(init_bot_graph):
+    graph = init_bot_graph
+    concept = gel.Concept('standalone')
+    assert not concept.is_empty()
+    concept.add_arrow(gel.Arrow(graph.get_concept('C'), graph.is_a))
+    assert concept.is_empty()
+
+    # arrows added to the concepts of a graph directly are still seen
+    concept_b = gel.Concept('B')
+    graph.add_concept(concept_b)
+    concept_b.add_arrow(gel.Arrow(graph.get_concept('C'), graph.is_a))
+    assert concept_b.is_empty() and concept_b in graph.empty_concepts
+    concept_b.remove_arrow(gel.Arrow(graph.get_concept('C'), graph.is_a))
+    assert not concept_b.is_empty()
+
+
+@pytest.mark.timeout(5)
+def test_graph_empty_concepts_follow_edits():
+    random.seed(0)
+    graph = gel.KnowledgeBase.random(concepts_count=30,
+                                     axioms_count=0,
+                                     uncertain_axioms_count=0,
+                                     roles_count=1)
+    concepts = graph.concepts
+    for _ in range(300):
+        sub_concept, sup_concept = random.sample(concepts[1:], 2)
+        arrow = gel.Arrow(sup_concept, random.choice(graph.roles),
+                          pbox_id=random.choice([-1, 0]))
+        if sub_concept.has_arrow(arrow):
+            graph.remove_arrow(sub_concept, arrow)
+        else:
+            graph.add_arrow(sub_concept, arrow)
+
+        expected = {c for c in concepts
+                    if graph.bot in reached_by_certain_is_a(c)}
+        assert graph.empty_concepts == expected
+
+
+def reached_by_certain_is_a(concept):
+    reached = {concept}
+    stack = [concept]
+    while len(stack) > 0:
+        for sup_concept in stack.pop().is_a():
+            if sup_concept not in reached:
+                reached.add(sup_concept)
+                stack += [sup_concept]
+    return reached
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize('role', ['all', 'is a'])
+def test_reachability_index_matches_walk(role):
+    random.seed(1)
+    graph = gel.KnowledgeBase.random(concepts_count=25,
+                                     axioms_count=40,
+                                     uncertain_axioms_count=10,
+                                     roles_count=1)
+    index = gel.ReachabilityIndex(graph, role=role)
+    walk_role = role if role == 'all' else graph.is_a
+
+    def assert_matches_walk():
+        for concept in graph.concepts:
+            reached = set(concept.sup_concepts_reached(role=walk_role))
+            assert set(index.reached(concept)) == reached
+            for other_concept in graph.concepts:
+                assert index.reaches(concept, other_concept) == \
+                    (other_concept in reached)
+
+    assert_matches_walk()
+    graph.add_random_axioms(20)
+    graph.add_concept(gel.IndividualConcept('a'))
+    graph.add_axiom('a', '3', graph.is_a)
+    assert_matches_walk()
+
+    concept = graph.get_concept('3')
+    for arrow in list(concept.sup_arrows):
+        graph.remove_arrow(concept, arrow)
+    assert_matches_walk()
+
+
+@pytest.mark.timeout(5)
+def test_concept_walks_deep_taxonomy():
+    graph = gel.KnowledgeBase('bot', 'top')
+    for i in range(3000):
+        graph.add_concept(gel.Concept(i))
+        if i > 0:
+            graph.add_axiom(str(i - 1), str(i), graph.is_a)
+
+    first_concept = graph.get_concept('0')
+    assert len(list(first_concept.sup_concepts_reached())) == 3000
+    assert gel.ReachabilityIndex(graph).reaches('0', '2999')
+
+
+@pytest.mark.timeout(2)
+def test_graph_snapshot_round_trip(graph_pre_chained_role_inclusion,
+                                   tmp_path):
+    graph = graph_pre_chained_role_inclusion
+    graph.add_concept(gel.IndividualConcept('a'))
+    graph.add_concept(gel.ExistentialConcept('k', 'D'))
+    graph.add_chained_role_inclusion(('i', 'j'), 'k')
+    graph.add_role_inclusion('i', 'j')
+    graph.add_axiom('a', 'C', graph.is_a, pbox_id=0)
+    graph.add_axiom('C', 'D_prime', 'i')
+    graph.add_axiom('D_prime', 'D', 'j', pbox_id=1)
+    graph.saturate()
+
+    path = tmp_path / 'graph.snapshot'
+    graph.save_snapshot(path)
+    loaded_graph = gel.KnowledgeBase.load_snapshot(path)
+    loaded_graph.saturate()
+
+    def get_arrows(graph):
+        return {(concept.iri, type(concept).__name__, str(arrow.role),
+                 arrow.concept.iri, arrow.pbox_id, arrow.is_derived)
+                for concept in graph.concepts for arrow in concept.sup_arrows}
+
+    assert get_arrows(loaded_graph) == get_arrows(graph)
+    assert loaded_graph.fingerprint == graph.fingerprint
+    assert {key: [role.iri for role in roles]
+            for key, roles in loaded_graph.role_inclusions.items()} == \
+        {'i': ['j'], ('i', 'j'): ['k']}
+    assert loaded_graph.pbox_axioms.keys() == {0, 1}
+
+
+@pytest.mark.timeout(1)
+def test_snapshot_builds_concepts_on_access(simple_graph, tmp_path):
+    path = tmp_path / 'graph.snapshot'
+    simple_graph.save_snapshot(path)
+    with gel.Snapshot(path) as snapshot:
+        assert snapshot.concept_count == len(simple_graph.concepts)
+        concept = snapshot.get_concept(simple_graph.get_concept('r.C').id)
+        assert isinstance(concept, gel.ExistentialConcept)
+        assert concept.iri == 'r.C'
+        assert snapshot.get_concept(concept.id) is concept
+
+
+@pytest.mark.timeout(1)
+def test_snapshot_keeps_initial_concepts(simple_graph, tmp_path):
+    simple_graph.add_concept(InitialConcept('start'))
+    path = tmp_path / 'graph.snapshot'
+    simple_graph.save_snapshot(path)
+    with gel.Snapshot(path) as snapshot:
+        concept = snapshot.get_concept(simple_graph.get_concept('start').id)
+        assert isinstance(concept, InitialConcept)
+
+
+@pytest.mark.timeout(1)
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / 'graph.owl'
+    path.write_bytes(b'<rdf:RDF/>')
+    with pytest.raises(ValueError):
+        gel.Snapshot(path)
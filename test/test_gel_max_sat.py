@@ -0,0 +1,667 @@
+import random
+import numpy as np
+import pytest
+import gel_max_sat
+from gel_max_sat import gel
+from gel_max_sat.gel_max_sat import WeightedGraph, min_cut
+from gel_max_sat.sparse_flow import get_scale
+from gel_max_sat.decomposition import split_components
+
+ALGORITHMS = ['edmonds-karp', 'dinic', 'push-relabel']
+
+
+@pytest.fixture
+def conflicting_graph():
+    graph = gel.KnowledgeBase('bot', 'top')
+    graph.add_concept(gel.Concept('C'))
+    graph.add_concept(gel.Concept('D'))
+    graph.add_concept(gel.IndividualConcept('a'))
+    graph.add_axiom('a', 'C', graph.is_a, pbox_id=0)
+    graph.add_axiom('C', 'D', graph.is_a, pbox_id=1)
+    graph.add_axiom('D', 'bot', graph.is_a, pbox_id=2)
+    graph.add_axiom('a', 'D', graph.is_a, pbox_id=3)
+    return graph
+
+
+def random_problems(count, seed=0):
+    random.seed(seed)
+    for _ in range(count):
+        kb = gel.KnowledgeBase.random(concepts_count=20,
+                                      axioms_count=50,
+                                      uncertain_axioms_count=35,
+                                      roles_count=2)
+        weights = [random.randint(0, 10) for _ in range(35)]
+        yield kb, weights
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_solve_excludes_min_weight_axioms(conflicting_graph, algorithm):
+    result = gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2],
+                               algorithm=algorithm)
+    assert result['success']
+    assert sorted(result['prob_axiom_indexes']) == [1, 3]
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_solve_fails_on_certain_conflict(algorithm):
+    graph = gel.KnowledgeBase('bot', 'top')
+    graph.add_concept(gel.IndividualConcept('a'))
+    graph.add_axiom('a', 'bot', graph.is_a)
+    assert not gel_max_sat.solve(graph, [], algorithm=algorithm)['success']
+
+
+@pytest.mark.timeout(1)
+def test_solve_rejects_unknown_algorithm(conflicting_graph):
+    with pytest.raises(ValueError):
+        gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2], algorithm='foo')
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize('algorithm', ALGORITHMS[1:] + ['scipy'])
+def test_algorithms_match_edmonds_karp(algorithm):
+    for kb, weights in random_problems(20):
+        expected = gel_max_sat.solve(kb, weights)
+        result = gel_max_sat.solve(kb, weights, algorithm=algorithm)
+        assert result['success'] == expected['success']
+        if expected['success']:
+            assert sorted(result['prob_axiom_indexes']) == \
+                sorted(expected['prob_axiom_indexes'])
+
+
+@pytest.mark.timeout(1)
+def test_min_cut_leaves_weighted_graph_untouched(conflicting_graph):
+    weighted_graph = WeightedGraph(conflicting_graph, [5, 1, 4, 2])
+    capacities = list(weighted_graph.capacities)
+
+    cut_set = min_cut(weighted_graph)
+    assert list(weighted_graph.capacities) == capacities
+    assert min_cut(weighted_graph, 'dinic') == cut_set
+
+
+@pytest.mark.timeout(1)
+def test_solve_many_matches_solve(conflicting_graph):
+    weights_matrix = np.array([[5, 1, 4, 2], [1, 5, 4, 2], [-1, 3, 3, 0]])
+    results = gel_max_sat.solve_many(conflicting_graph, weights_matrix)
+    assert results == [gel_max_sat.solve(conflicting_graph, list(weights))
+                       for weights in weights_matrix]
+
+
+@pytest.mark.timeout(10)
+def test_solve_many_in_process_pool_keeps_order(conflicting_graph):
+    weights_matrix = np.random.RandomState(0).randint(0, 10, size=(20, 4))
+    expected = gel_max_sat.solve_many(conflicting_graph, weights_matrix)
+    results = gel_max_sat.solve_many(conflicting_graph, weights_matrix,
+                                     processes=2)
+    assert results == expected
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_solve_handles_float_weights(algorithm):
+    def get_weight(result, weights):
+        return sum(weights[pbox_id]
+                   for pbox_id in result.get('prob_axiom_indexes', []))
+
+    for kb, weights in random_problems(100, seed=1):
+        weights = [weight + random.random() for weight in weights]
+        result = gel_max_sat.solve(kb, weights, algorithm=algorithm)
+        expected_result = gel_max_sat.solve(kb, weights)
+        assert result['success'] == expected_result['success']
+        assert get_weight(result, weights) == \
+            pytest.approx(get_weight(expected_result, weights))
+
+
+@pytest.mark.timeout(1)
+def test_solve_many_rejects_flat_weights(conflicting_graph):
+    with pytest.raises(ValueError):
+        gel_max_sat.solve_many(conflicting_graph, [5, 1, 4, 2])
+
+
+@pytest.mark.timeout(1)
+def test_solver_update_weights_matches_solve(conflicting_graph):
+    solver = gel_max_sat.Solver(conflicting_graph, [5, 1, 4, 2])
+    assert solver.result() == gel_max_sat.solve(conflicting_graph,
+                                                [5, 1, 4, 2])
+
+    result = solver.update_weights({1: 6, 3: 7})
+    assert result == gel_max_sat.solve(conflicting_graph, [5, 6, 4, 7])
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_solver_warm_start_matches_solve(algorithm):
+    for kb, weights in random_problems(10):
+        solver = gel_max_sat.Solver(kb, weights, algorithm=algorithm)
+        for _ in range(5):
+            changes = {random.randrange(len(weights)): random.randint(-2, 10)
+                       for _ in range(3)}
+            result = solver.update_weights(changes)
+            weights = [changes.get(i, w) for i, w in enumerate(weights)]
+            assert result == gel_max_sat.solve(kb, weights)
+
+
+@pytest.mark.timeout(1)
+def test_solver_repairs_overflows_once():
+    kb = gel.KnowledgeBase('bot', 'top')
+    kb.add_concept(gel.IndividualConcept('a'))
+    kb.add_axiom('a', 'bot', kb.is_a, pbox_id=0)
+    solver = gel_max_sat.Solver(kb, [-1])
+    solver.update_weights({0: 3})
+    assert solver.update_weights({0: 0}) == gel_max_sat.solve(kb, [0])
+    assert solver.flow == 0
+
+
+@pytest.mark.timeout(10)
+def test_solver_weight_sequences_match_solve():
+    def get_weight(result, weights):
+        return sum(max(0, weights[pbox_id])
+                   for pbox_id in result.get('prob_axiom_indexes', []))
+
+    for kb, weights in random_problems(50, seed=3):
+        solver = gel_max_sat.Solver(kb, weights)
+        for _ in range(10):
+            changes = {random.randrange(len(weights)): random.randint(-3, 10)
+                       for _ in range(3)}
+            result = solver.update_weights(changes)
+            weights = [changes.get(i, w) for i, w in enumerate(weights)]
+            expected_result = gel_max_sat.solve(kb, weights)
+            assert result['success'] == expected_result['success']
+            assert get_weight(result, weights) == \
+                get_weight(expected_result, weights)
+            assert solver.flow >= 0
+
+
+@pytest.mark.timeout(1)
+def test_attached_solver_follows_kb_edits(conflicting_graph):
+    kb = conflicting_graph
+    weights = [5, 1, 4, 2, 3]
+    solver = gel_max_sat.Solver(kb, weights)
+    solver.attach()
+    graph = solver.weighted_graph
+
+    kb.set_pbox_id('C', 'D', kb.is_a, 4)
+    assert solver.update() == gel_max_sat.solve(kb, weights)
+
+    kb.remove_arrow(kb.get_concept('a'), gel.Arrow(kb.get_concept('D'),
+                                                   kb.is_a))
+    assert solver.update() == gel_max_sat.solve(kb, weights)
+
+    kb.add_concept(gel.Concept('E'))
+    kb.add_axiom('a', 'E', kb.is_a, pbox_id=3)
+    kb.add_axiom('E', 'bot', kb.is_a)
+    assert solver.update() == gel_max_sat.solve(kb, weights)
+    # the edits were made in place
+    assert solver.weighted_graph is graph
+
+    solver.detach()
+    assert solver not in kb.listeners
+
+
+@pytest.mark.timeout(1)
+def test_attached_solver_rebuilds_when_out_of_edges(conflicting_graph):
+    kb = conflicting_graph
+    weights = [5, 1, 4, 2] + [1] * 8
+    solver = gel_max_sat.Solver(kb, weights)
+    solver.attach()
+    graph = solver.weighted_graph
+
+    for i in range(8):
+        kb.add_concept(gel.Concept(f'E{i}'))
+        kb.add_axiom('a', f'E{i}', kb.is_a, pbox_id=4 + i)
+        kb.add_axiom(f'E{i}', 'bot', kb.is_a)
+    assert solver.update() == gel_max_sat.solve(kb, weights)
+    assert solver.weighted_graph is not graph
+
+    kb.remove_arrow(kb.get_concept('a'), gel.Arrow(kb.get_concept('E0'),
+                                                   kb.is_a))
+    assert solver.update() == gel_max_sat.solve(kb, weights)
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_attached_solver_matches_solve(algorithm):
+    def sort_result(result):
+        return {**result, 'prob_axiom_indexes': sorted(
+            result.get('prob_axiom_indexes', []))}
+
+    for kb, weights in random_problems(5):
+        solver = gel_max_sat.Solver(kb, weights, algorithm=algorithm)
+        solver.attach()
+        for _ in range(5):
+            concepts = kb.concepts
+            arrows = [(concept, arrow) for concept in concepts
+                      for arrow in concept.sup_arrows
+                      if not arrow.is_derived]
+            for concept, arrow in random.sample(arrows, 3):
+                kb.set_pbox_id(concept, arrow.concept, arrow.role,
+                               random.randrange(-1, len(weights)))
+            concept, arrow = random.choice(arrows[3:])
+            kb.remove_arrow(concept, arrow)
+            kb.add_axiom(random.choice(concepts), random.choice(concepts[1:]),
+                         random.choice(kb.roles),
+                         pbox_id=random.randrange(len(weights)))
+
+            result = solver.update()
+            assert sort_result(result) == \
+                sort_result(gel_max_sat.solve(kb, weights))
+
+
+@pytest.mark.timeout(1)
+def test_solver_rejects_invalid_pbox_id(conflicting_graph):
+    solver = gel_max_sat.Solver(conflicting_graph, [5, 1, 4, 2])
+    with pytest.raises(Exception):
+        solver.update_weights({4: 1})
+    with pytest.raises(ValueError):
+        solver.update_weights({-1: 1})
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_solve_parametric_finds_breakpoints(conflicting_graph, algorithm):
+    intervals = gel_max_sat.solve_parametric(
+        conflicting_graph, [5, 1, 4, 2], [0, 1, 0, 0], 0, 10,
+        algorithm=algorithm)
+
+    assert [(i['lower'], i['upper'], i['prob_axiom_indexes'])
+            for i in intervals] == [(0, 1, [1, 3]), (1, 10, [2])]
+
+
+@pytest.mark.timeout(10)
+def test_solve_parametric_matches_solve():
+    for kb, weights in random_problems(10):
+        slopes = [random.randint(-3, 3) for _ in weights]
+        intervals = gel_max_sat.solve_parametric(kb, weights, slopes, -2, 2)
+        assert intervals[0]['lower'] == -2
+        assert intervals[-1]['upper'] == 2
+
+        for interval in intervals:
+            parameter = (interval['lower'] + interval['upper']) / 2
+            result = gel_max_sat.solve(
+                kb, [w + parameter * s for w, s in zip(weights, slopes)])
+            assert result['success'] == interval['success']
+            if result['success']:
+                assert sorted(set(result['prob_axiom_indexes'])) == \
+                    interval['prob_axiom_indexes']
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_solve_parametric_crosses_zero(conflicting_graph, algorithm):
+    # the weight of 0 goes from 4 to -4, through zero at 0
+    problems = [(conflicting_graph, [0, 1, 4, 2])] + \
+        [(kb, [0] + weights[1:]) for kb, weights in random_problems(5)]
+    for kb, weights in problems:
+        slopes = [-2] + [0] * (len(weights) - 1)
+        intervals = gel_max_sat.solve_parametric(kb, weights, slopes, -2, 2,
+                                                 algorithm=algorithm)
+        assert intervals[0]['lower'] == -2
+        assert intervals[-1]['upper'] == 2
+
+        for interval in intervals:
+            parameter = (interval['lower'] + interval['upper']) / 2
+            result = gel_max_sat.solve(
+                kb, [w + parameter * s for w, s in zip(weights, slopes)])
+            assert result['success'] == interval['success']
+            if result['success']:
+                assert sorted(set(result['prob_axiom_indexes'])) == \
+                    interval['prob_axiom_indexes']
+
+
+@pytest.mark.timeout(1)
+def test_solve_parametric_handles_unsuccessful_probe(conflicting_graph,
+                                                     monkeypatch):
+    def update_weights(self, weights):
+        return {'success': False}
+
+    monkeypatch.setattr(gel_max_sat.Solver, 'update_weights',
+                        update_weights)
+    assert gel_max_sat.solve_parametric(
+        conflicting_graph, [5, 1, 4, 2], [0, 1, 0, 0], 0, 10) == \
+        [{'lower': 0, 'upper': 10, 'success': False}]
+
+
+@pytest.mark.timeout(1)
+def test_reduce_graph_shrinks_graph(conflicting_graph):
+    conflicting_graph.add_concept(gel.Concept('E'))
+    conflicting_graph.add_axiom('C', 'E', conflicting_graph.is_a)
+    conflicting_graph.add_axiom('E', 'C', conflicting_graph.is_a)
+    conflicting_graph.add_axiom('D', 'E', conflicting_graph.is_a, pbox_id=4)
+
+    result = gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2, 3],
+                               reduce=True)
+    reduction = result['reduction']
+    assert reduction.pruned_vertices == 1
+    assert reduction.contracted_vertices == 1
+    assert reduction.reduced_order == reduction.order - 2
+    assert sorted(result['prob_axiom_indexes']) == [1, 3]
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_solve_reduced_to_no_arrows(algorithm):
+    kb = gel.KnowledgeBase('bot', 'top')
+    kb.add_concept(gel.IndividualConcept('a'))
+    kb.add_axiom('a', 'top', kb.is_a, pbox_id=0)
+    result = gel_max_sat.solve(kb, [1], algorithm=algorithm, reduce=True)
+    assert result['reduction'].reduced_size == 0
+    # a and top are pruned, init and bot stay
+    assert result['reduction'].order == 4
+    assert result['reduction'].pruned_vertices == 2
+    assert result['prob_axiom_indexes'] == []
+
+
+@pytest.mark.timeout(5)
+def test_reduce_graph_keeps_min_cut_weight():
+    for kb, weights in random_problems(20):
+        expected = gel_max_sat.solve(kb, weights)
+        result = gel_max_sat.solve(kb, weights, reduce=True)
+        assert result['success'] == expected['success']
+        if expected['success']:
+            assert sum(weights[i] for i in result['prob_axiom_indexes']) == \
+                sum(weights[i] for i in expected['prob_axiom_indexes'])
+
+
+@pytest.mark.timeout(1)
+def test_get_certain_chain_returns_witness():
+    graph = gel.KnowledgeBase('bot', 'top')
+    graph.add_concept(gel.Concept('C'))
+    graph.add_concept(gel.IndividualConcept('a'))
+    graph.add_axiom('a', 'C', graph.is_a)
+    graph.add_axiom('a', 'bot', graph.is_a, pbox_id=0)
+    assert gel_max_sat.get_certain_chain(graph) is None
+    assert gel_max_sat.is_satisfiable(graph, [1])
+
+    graph.add_axiom('C', 'bot', graph.is_a)
+    chain = gel_max_sat.get_certain_chain(graph)
+    assert [(sub.iri, arrow.concept.iri) for sub, arrow in chain] == \
+        [('init', 'a'), ('a', 'C'), ('C', 'bot')]
+    assert not gel_max_sat.is_satisfiable(graph, [1])
+
+
+@pytest.mark.timeout(5)
+def test_is_satisfiable_matches_solve():
+    for kb, weights in random_problems(20):
+        assert gel_max_sat.is_satisfiable(kb, weights) == \
+            gel_max_sat.solve(kb, weights)['success']
+
+
+@pytest.mark.timeout(1)
+def test_scipy_scale_fits_int32(conflicting_graph):
+    weighted_graph = WeightedGraph(conflicting_graph, [0.5, 0.25, 0.3, 0.1])
+    scale = get_scale(weighted_graph)
+    assert 1.15 * scale + weighted_graph.size < 2**31 - 1
+    assert 2 * 1.15 * scale + weighted_graph.size >= 2**31 - 1
+
+    result = gel_max_sat.solve(conflicting_graph, [0.5, 0.25, 0.3, 0.1],
+                               algorithm='scipy')
+    assert sorted(result['prob_axiom_indexes']) == [2]
+
+
+@pytest.mark.timeout(5)
+def test_scipy_keeps_certain_paths_uncut():
+    # a certain path to bot, with an uncertain arrow beside its last one
+    for kb, weights in random_problems(10, seed=14):
+        kb.add_concept(gel.IndividualConcept('x'))
+        kb.add_axiom('x', 'bot', kb.is_a)
+        kb.add_axiom('x', 'bot', 'r', pbox_id=0)
+        weights = [weight + 0.5 for weight in weights]
+        assert gel_max_sat.solve(kb, weights, algorithm='scipy') == \
+            gel_max_sat.solve(kb, weights) == {'success': False}
+
+    for kb, weights in random_problems(100, seed=14):
+        weights = [weight + 0.5 for weight in weights]
+        assert gel_max_sat.solve(kb, weights, algorithm='scipy')['success'] \
+            == gel_max_sat.solve(kb, weights)['success']
+
+
+@pytest.mark.timeout(1)
+def test_split_components_finds_independent_parts(conflicting_graph):
+    conflicting_graph.add_concept(gel.IndividualConcept('b'))
+    conflicting_graph.add_axiom('b', 'bot', conflicting_graph.is_a,
+                                pbox_id=4)
+    weighted_graph = WeightedGraph(conflicting_graph, [5, 1, 4, 2, 3])
+    subgraphs = split_components(weighted_graph)
+    assert sorted(len(subgraph.vertices) for subgraph in subgraphs) == \
+        [3, 3, 5]
+
+    result = gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2, 3],
+                               processes=2)
+    assert sorted(result['prob_axiom_indexes']) == [1, 3, 4]
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize('reduce', [False, True])
+def test_parallel_solve_matches_solve(reduce):
+    for kb, weights in random_problems(10):
+        assert gel_max_sat.solve(kb, weights, reduce=reduce, processes=2) == \
+            gel_max_sat.solve(kb, weights, reduce=reduce)
+
+
+@pytest.mark.timeout(1)
+def test_solve_cache_counts_hits_and_evicts(conflicting_graph):
+    cache = gel_max_sat.SolveCache(maxsize=1)
+    result = cache.solve(conflicting_graph, [5, 1, 4, 2])
+    assert result == gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2])
+    assert cache.solve(conflicting_graph, [5, 1, 4, 2]) == result
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.solve(conflicting_graph, [1, 5, 4, 2])
+    cache.solve(conflicting_graph, [5, 1, 4, 2])
+    assert (cache.hits, cache.misses, len(cache)) == (1, 3, 1)
+
+    conflicting_graph.add_axiom('C', 'bot', conflicting_graph.is_a, pbox_id=4)
+    result = cache.solve(conflicting_graph, [5, 1, 4, 2, 1])
+    assert sorted(result['prob_axiom_indexes']) == [1, 3, 4]
+    assert cache.misses == 4
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_solve_stats_records_phases(conflicting_graph, algorithm):
+    result = gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2],
+                               algorithm=algorithm, stats=True)
+    stats = result.pop('stats')
+    assert result == gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2],
+                                       algorithm=algorithm)
+    assert set(stats.timings) == {'build', 'copy', 'augment', 'dfs',
+                                  'cut_set'}
+    assert stats.flow == 3
+    assert (stats.order, stats.size) == (6, 6)
+    assert stats.vertex_visits > 0 and stats.edge_visits > 0
+    if algorithm != 'push-relabel':
+        assert stats.augmenting_paths == 2
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_solve_time_budget_bounds_optimum(conflicting_graph, algorithm):
+    weights = [5, 1, 4, 2]
+    result = gel_max_sat.solve(conflicting_graph, weights,
+                               algorithm=algorithm, time_budget=0)
+    assert result['success'] and result['approximate']
+    assert result['lower_bound'] <= 3 <= result['upper_bound']
+    assert result['upper_bound'] == \
+        sum(weights[i] for i in result['prob_axiom_indexes'])
+
+    result = gel_max_sat.solve(conflicting_graph, weights,
+                               algorithm=algorithm, time_budget=60)
+    assert not result['approximate']
+    assert result['lower_bound'] == result['upper_bound'] == 3
+    assert sorted(result['prob_axiom_indexes']) == [1, 3]
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_solve_time_budget_avoids_certain_arrows(algorithm):
+    graph = gel.KnowledgeBase('bot', 'top')
+    for iri in ['X', 'Y', 'Z']:
+        graph.add_concept(gel.Concept(iri))
+    graph.add_concept(gel.IndividualConcept('a'))
+    graph.add_axiom('a', 'X', graph.is_a)
+    graph.add_axiom('X', 'bot', graph.is_a, pbox_id=0)
+    graph.add_axiom('a', 'Y', graph.is_a, pbox_id=1)
+    graph.add_axiom('Y', 'Z', graph.is_a)
+    graph.add_axiom('Z', 'bot', graph.is_a)
+
+    result = gel_max_sat.solve(graph, [1, 1], algorithm=algorithm,
+                               time_budget=0)
+    assert result['success']
+    assert sorted(result['prob_axiom_indexes']) == [0, 1]
+    assert result['upper_bound'] == 2
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_solve_time_budget_finds_unsatisfiable(conflicting_graph, algorithm):
+    conflicting_graph.add_axiom('a', 'bot', conflicting_graph.is_a)
+    result = gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2],
+                               algorithm=algorithm, time_budget=0)
+    assert result == {'success': False}
+
+
+@pytest.mark.timeout(1)
+def test_solve_time_budget_rejects_scipy(conflicting_graph):
+    with pytest.raises(ValueError):
+        gel_max_sat.solve(conflicting_graph, [5, 1, 4, 2],
+                          algorithm='scipy', time_budget=1)
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('algorithm', ALGORITHMS)
+def test_solve_k_best_ranks_every_cut(conflicting_graph, algorithm):
+    repairs = gel_max_sat.solve_k_best(conflicting_graph, [5, 1, 4, 2], 10,
+                                       algorithm=algorithm)
+    assert [(r['prob_axiom_indexes'], r['excluded_weight'])
+            for r in repairs] == [([1, 3], 3), ([2], 4), ([0, 3], 7),
+                                  ([0, 2], 9)]
+
+
+@pytest.mark.timeout(10)
+def test_solve_k_best_starts_with_solve():
+    for kb, weights in random_problems(10):
+        result = gel_max_sat.solve(kb, weights)
+        repairs = gel_max_sat.solve_k_best(kb, weights, 5)
+        if not result['success']:
+            assert repairs == [{'success': False}]
+            continue
+
+        assert repairs[0]['prob_axiom_indexes'] == \
+            sorted(set(result['prob_axiom_indexes']))
+        excluded_weights = [r['excluded_weight'] for r in repairs]
+        assert excluded_weights == sorted(excluded_weights)
+        assert len({tuple(r['prob_axiom_indexes']) for r in repairs}) == \
+            len(repairs)
+
+
+@pytest.fixture
+def chained_graph():
+    graph = gel.KnowledgeBase('bot', 'top')
+    for iri in ['B', 'E']:
+        graph.add_concept(gel.Concept(iri))
+    graph.add_concept(gel.IndividualConcept('a'))
+    for iri in ['r', 's', 't']:
+        graph.add_role(gel.Role(iri))
+    graph.add_chained_role_inclusion(('r', 's'), 't')
+    graph.add_concept(gel.ExistentialConcept('t', 'E'))
+    graph.add_axiom('t.E', 'bot', graph.is_a, pbox_id=2)
+    graph.add_axiom('a', 'B', 'r', pbox_id=0)
+    graph.add_axiom('B', 'E', 's', pbox_id=1)
+    return graph
+
+
+@pytest.mark.timeout(1)
+def test_saturation_applies_role_chains(chained_graph):
+    # removing either premise of the chain removes the derived arrow
+    assert gel_max_sat.solve(chained_graph, [10, 1, 3]) == \
+        {'success': True, 'prob_axiom_indexes': [1]}
+    assert gel_max_sat.solve(chained_graph, [1, 10, 3]) == \
+        {'success': True, 'prob_axiom_indexes': [0]}
+
+    derived = [(c.iri, a.premise_sets) for c in chained_graph.concepts
+               for a in c.sup_arrows if a.is_derived]
+    assert derived == [('a', ((0, 1),))]
+
+    solver = gel_max_sat.Solver(chained_graph, [10, 1, 3])
+    assert solver.update_weights({0: 2, 1: 20}) == \
+        {'success': True, 'prob_axiom_indexes': [0]}
+
+    # new axioms are saturated incrementally on the next solve
+    chained_graph.add_concept(gel.IndividualConcept('c'))
+    chained_graph.add_axiom('c', 'B', 'r')
+    assert gel_max_sat.solve(chained_graph, [10, 4, 3]) == \
+        {'success': True, 'prob_axiom_indexes': [2]}
+
+
+@pytest.fixture
+def two_derivations_graph():
+    # A ⊑ ∃r.E follows from either existential of A
+    graph = gel.KnowledgeBase('bot', 'top')
+    for iri in ['A', 'B1', 'B2', 'E']:
+        graph.add_concept(gel.Concept(iri))
+    graph.add_role(gel.Role('r'))
+    graph.add_concept(gel.ExistentialConcept('r', 'E'))
+    graph.add_axiom('A', 'B1', 'r', pbox_id=0)
+    graph.add_axiom('A', 'B2', 'r', pbox_id=1)
+    graph.add_axiom('B1', 'E', graph.is_a)
+    graph.add_axiom('B2', 'E', graph.is_a)
+    graph.add_axiom('r.E', 'bot', graph.is_a)
+    graph.add_axiom('top', 'A', graph.is_a)
+    return graph
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize('algorithm', ALGORITHMS + ['scipy'])
+def test_saturation_keeps_every_derivation(two_derivations_graph,
+                                           algorithm, tmp_path):
+    kb = two_derivations_graph
+    expected = {'success': True, 'prob_axiom_indexes': [0, 1]}
+    assert gel_max_sat.solve(kb, [1, 2], algorithm=algorithm) == expected
+
+    derived = [(c.iri, a.premise_sets) for c in kb.concepts
+               for a in c.sup_arrows if a.is_derived]
+    assert derived == [('A', ((0,), (1,)))]
+
+    path = tmp_path / 'graph.snapshot'
+    kb.save_snapshot(path)
+    with gel.Snapshot(path) as snapshot:
+        assert gel_max_sat.solve(snapshot, [1, 2],
+                                 algorithm=algorithm) == expected
+
+    # a certain derivation makes the other two redundant
+    solver = gel_max_sat.Solver(kb, [1, 2], algorithm)
+    solver.attach()
+    kb.add_concept(gel.Concept('B3'))
+    kb.add_axiom('A', 'B3', 'r')
+    kb.add_axiom('B3', 'E', kb.is_a)
+    assert solver.update() == {'success': False}
+    kb.remove_arrow(kb.get_concept('A'),
+                    gel.Arrow(kb.get_concept('B3'), kb.get_role('r')))
+    assert solver.update() == expected
+    assert solver.update_weights({1: 0.5}) == expected
+
+
+@pytest.mark.timeout(1)
+def test_weighted_graph_leaves_kb_unsaturated(chained_graph):
+    def get_derived_arrows():
+        return [a for c in chained_graph.concepts for a in c.sup_arrows
+                if a.is_derived]
+
+    WeightedGraph(chained_graph, [10, 1, 3])
+    assert get_derived_arrows() == []
+
+    assert gel_max_sat.is_satisfiable(chained_graph, [10, 1, 3])
+    assert len(get_derived_arrows()) == 1
+
+
+@pytest.mark.timeout(5)
+def test_solve_snapshot_matches_solve(chained_graph, tmp_path):
+    path = tmp_path / 'graph.snapshot'
+    problems = [(chained_graph, [10, 1, 3]), (chained_graph, [1, 10, 3])]
+    for kb, weights in problems + list(random_problems(5)):
+        kb.save_snapshot(path)
+        with gel.Snapshot(path) as snapshot:
+            result = gel_max_sat.solve(snapshot, weights)
+            assert snapshot._concepts == {}
+        assert result == gel_max_sat.solve(kb, weights)